@@ -0,0 +1,57 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+
+from .versions import get_version
+
+COUNTS_VERSION = 'counts'
+COUNT_KEY = 'count:{version}:{signature}'
+
+
+def get_count_signature(queryset):
+    query = queryset.query
+    compiler = query.get_compiler(queryset.db)
+    where, params = compiler.compile(query.where)
+    signature = '|'.join((
+        query.model._meta.label,
+        ','.join(sorted(query.alias_map)),
+        str(query.distinct),
+        where,
+        repr(params),
+    ))
+    return where, hashlib.md5(signature.encode()).hexdigest()
+
+
+def get_estimated_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def get_count(queryset):
+    try:
+        where, signature = get_count_signature(queryset)
+    except EmptyResultSet:
+        return 0, True
+    if not where and len(queryset.query.alias_map) == 1:
+        estimate = get_estimated_count(queryset)
+        if estimate is not None and (
+                estimate > settings.COUNT_ESTIMATE_THRESHOLD):
+            return estimate, False
+    key = COUNT_KEY.format(version=get_version(COUNTS_VERSION),
+                           signature=signature)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.order_by().values('pk').count()
+        cache.set(key, count, settings.COUNT_CACHE_TIMEOUT)
+    return count, True
@@ -1,5 +1,163 @@
-from rest_framework.pagination import PageNumberPagination
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .counts import get_count
+
+MAX_PAGE_SIZE = 100
+
+
+class CachedCountPaginator(Paginator):
+    count_exact = True
+
+    @cached_property
+    def count(self):
+        count, self.count_exact = get_count(self.object_list)
+        return count
+
+
+class CustomCursorPagination(CursorPagination):
+    page_size_query_param = 'limit'
+    max_page_size = MAX_PAGE_SIZE
+    ordering_param = 'ordering'
+    ordering = '-id'
+    position_separator = ','
+
+    def get_ordering(self, request, queryset, view):
+        orderings = getattr(view, 'cursor_orderings', (self.ordering,))
+        ordering = request.query_params.get(self.ordering_param)
+        if ordering not in orderings:
+            ordering = orderings[0]
+        if queryset.model._meta.get_field(ordering.lstrip('-')).unique:
+            return (ordering,)
+        return (ordering, '-pk' if ordering.startswith('-') else 'pk')
+
+    def get_seek_filter(self, ordering, position):
+        values = position.rsplit(self.position_separator, len(ordering) - 1)
+        if len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        seek, ties = Q(), Q()
+        for order, value in zip(ordering, values):
+            name = order.lstrip('-')
+            lookup = 'lt' if order.startswith('-') else 'gt'
+            seek |= ties & Q(**{f'{name}__{lookup}': value})
+            ties &= Q(**{name: value})
+        if len(ordering) > 1:
+            name = ordering[0].lstrip('-')
+            lookup = 'lte' if ordering[0].startswith('-') else 'gte'
+            seek &= Q(**{f'{name}__{lookup}': values[0]})
+        return seek
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, position = self.cursor or (0, False, None)
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(order[1:] if order.startswith('-')
+                             else f'-{order}' for order in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(
+                    self.get_seek_filter(ordering, position))
+            except (ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = None
+        if len(results) > self.page_size:
+            following = self._get_position_from_instance(
+                results[-1], self.ordering)
+        current = position is not None or offset > 0
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = current, following is not None
+            self.next_position, self.previous_position = position, following
+        else:
+            self.has_next, self.has_previous = following is not None, current
+            self.next_position, self.previous_position = following, position
+        self.display_page_controls = self.has_previous or self.has_next
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        return self.position_separator.join(
+            str(getattr(instance, order.lstrip('-'))) for order in ordering)
 
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+    max_page_size = MAX_PAGE_SIZE
+    django_paginator_class = CachedCountPaginator
+    cursor_pagination_class = CustomCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        cursor_param = self.cursor_pagination_class.cursor_query_param
+        if cursor_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_pagination_class()
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        paginator = self.page.paginator
+        return Response(OrderedDict([
+            ('count', paginator.count),
+            ('count_exact', paginator.count_exact),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class KeysetPagination(BasePagination):
+    page_size_query_param = 'limit'
+    before_query_param = 'before'
+    max_page_size = MAX_PAGE_SIZE
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_before(self, request):
+        try:
+            return int(request.query_params[self.before_query_param])
+        except (KeyError, ValueError):
+            return None
+
+    def paginate_keys(self, get_keys, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        keys = get_keys(self.get_before(request), self.page_size + 1)
+        self.has_next = len(keys) > self.page_size
+        self.keys = keys[:self.page_size]
+        return self.keys
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(),
+                                   self.before_query_param, self.keys[-1])
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data)
+        ]))
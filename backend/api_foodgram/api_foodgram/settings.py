@@ -31,6 +31,7 @@ INSTALLED_APPS = [
     'django_filters',
     'recipes',
     'users',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -86,6 +87,54 @@ else:
     }
 
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    }
+}
+
+RECIPE_CACHE_TIMEOUT = int(os.getenv('RECIPE_CACHE_TIMEOUT', default=86400))
+COUNT_CACHE_TIMEOUT = int(os.getenv('COUNT_CACHE_TIMEOUT', default=300))
+COUNT_ESTIMATE_THRESHOLD = int(os.getenv('COUNT_ESTIMATE_THRESHOLD',
+                                         default=100000))
+
+INGREDIENT_INDEX_PATH = os.getenv(
+    'INGREDIENT_INDEX_PATH',
+    default=os.path.join(BASE_DIR, 'data', 'ingredients.idx'))
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', default='russian')
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT',
+                                        default=50))
+SHOPPING_LIST_PDF_DIR = os.getenv(
+    'SHOPPING_LIST_PDF_DIR',
+    default=os.path.join(BASE_DIR, 'data', 'shopping_lists'))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', default=1))
+JOB_TIMEOUT = int(os.getenv('JOB_TIMEOUT', default=300))
+JOB_RETRY_DELAY = int(os.getenv('JOB_RETRY_DELAY', default=10))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', default=5))
+IMAGE_MAX_BYTES = int(os.getenv('IMAGE_MAX_BYTES', default=10 * 2 ** 20))
+IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', default=40 * 10 ** 6))
+IMAGE_RELEASE_GRACE = int(os.getenv('IMAGE_RELEASE_GRACE', default=300))
+IMAGE_VARIANT_SIZES = {'small': (160, 160), 'medium': (640, 640)}
+IMAGE_VARIANT_FORMAT = os.getenv('IMAGE_VARIANT_FORMAT', default='webp')
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_VARIANT_CACHE_BYTES = int(os.getenv('IMAGE_VARIANT_CACHE_BYTES',
+                                          default=512 * 2 ** 20))
+RECIPE_EVENTS_FLUSH_INTERVAL = float(os.getenv(
+    'RECIPE_EVENTS_FLUSH_INTERVAL', default=10))
+RECIPE_EVENTS_BATCH_SIZE = int(os.getenv('RECIPE_EVENTS_BATCH_SIZE',
+                                         default=1000))
+BATCH_MAX_OPERATIONS = 200
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv('FEED_FANOUT_MAX_FOLLOWERS',
+                                          default=10000))
+RECIPE_IMPORT_WORKERS = int(os.getenv('RECIPE_IMPORT_WORKERS', default=2))
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf')
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME':
@@ -152,5 +201,6 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+DEFAULT_FILE_STORAGE = 'api_foodgram.storage.HashedFileSystemStorage'
 
 AUTH_USER_MODEL = 'users.User'
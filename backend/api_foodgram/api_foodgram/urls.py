@@ -1,13 +1,16 @@
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 
+from recipes.views import ImageVariantView
 from . import settings
 
 urlpatterns = [
     path('api/', include('recipes.urls')),
     path('admin/', admin.site.urls),
     path('api/', include('users.urls')),
+    re_path(r'^media/r/(?P<width>\d+)x(?P<height>\d+)/(?P<name>.+)$',
+            ImageVariantView.as_view(), name='image_variant'),
 ]
 
 if settings.DEBUG:
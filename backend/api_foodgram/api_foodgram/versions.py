@@ -0,0 +1,49 @@
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'version:{}'
+MODIFIED_KEY = 'modified:{}'
+
+
+def _initial_version():
+    return int(time.time() * 1000)
+
+
+def get_version(name):
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        if cache.add(key, _initial_version(), None):
+            cache.set(MODIFIED_KEY.format(name), int(time.time()), None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(names):
+    keys = {VERSION_KEY.format(name): name for name in names}
+    versions = cache.get_many(keys)
+    result = {keys[key]: version for key, version in versions.items()}
+    for name in names:
+        if name not in result:
+            result[name] = get_version(name)
+    return result
+
+
+def get_last_modified(names):
+    keys = [MODIFIED_KEY.format(name) for name in names]
+    modified = cache.get_many(keys)
+    if len(modified) < len(keys):
+        return int(time.time())
+    return max(modified.values())
+
+
+def bump_version(name):
+    key = VERSION_KEY.format(name)
+    cache.set(MODIFIED_KEY.format(name), int(time.time()), None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _initial_version()
+        cache.set(key, version, None)
+        return version
@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'attempts', 'run_at',
+                    'finished_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('locked_at', 'locked_by', 'last_error', 'created',
+                       'finished_at')
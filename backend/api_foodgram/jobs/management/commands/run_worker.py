@@ -0,0 +1,43 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.queue import get_worker_name, purge_finished, run_pending
+
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в базе данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить доступные задачи и выйти')
+        parser.add_argument('--interval', type=float,
+                            default=settings.JOB_POLL_INTERVAL,
+                            help='Пауза между опросами пустой очереди, с')
+        parser.add_argument('--keep-days', type=int, default=7,
+                            help='Сколько дней хранить выполненные задачи')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        worker = get_worker_name()
+        purged_at = 0
+        self.stdout.write(f'Обработчик {worker} запущен')
+        while not self.stopping:
+            if time.monotonic() - purged_at > PURGE_INTERVAL:
+                purge_finished(options['keep_days'])
+                purged_at = time.monotonic()
+            processed = run_pending(worker, limit=100)
+            if options['once'] and not processed:
+                break
+            if not processed:
+                time.sleep(options['interval'])
+        self.stdout.write(f'Обработчик {worker} остановлен')
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,44 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=100, verbose_name='Задача')
+    payload = models.TextField(default='{}', verbose_name='Параметры')
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED,
+                              verbose_name='Статус')
+    attempts = models.PositiveSmallIntegerField(default=0,
+                                                verbose_name='Попыток')
+    max_attempts = models.PositiveSmallIntegerField(
+        default=5, verbose_name='Максимум попыток')
+    run_at = models.DateTimeField(default=timezone.now,
+                                  verbose_name='Запустить после')
+    locked_at = models.DateTimeField(null=True, blank=True,
+                                     verbose_name='Взята в работу')
+    locked_by = models.CharField(max_length=100, blank=True,
+                                 verbose_name='Обработчик')
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+    created = models.DateTimeField(auto_now_add=True,
+                                   verbose_name='Создана')
+    finished_at = models.DateTimeField(null=True, blank=True,
+                                       verbose_name='Завершена')
+
+    class Meta:
+        ordering = ('-id',)
+        indexes = [models.Index(fields=['status', 'run_at'])]
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+class PermanentJobError(Exception):
+    pass
+
+
+def job(name):
+    def register(handler):
+        HANDLERS[name] = handler
+        return handler
+    return register
+
+
+def enqueue(name, run_at=None, max_attempts=None, **payload):
+    return Job.objects.create(
+        name=name, payload=json.dumps(payload),
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS)
+
+
+def get_worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def get_available_jobs(now):
+    stale = now - timedelta(seconds=settings.JOB_TIMEOUT)
+    return Job.objects.filter(
+        Q(status=Job.QUEUED, run_at__lte=now)
+        | Q(status=Job.RUNNING, locked_at__lt=stale))
+
+
+def claim_job(worker):
+    now = timezone.now()
+    with transaction.atomic():
+        available = get_available_jobs(now)
+        job_id = available.select_for_update(skip_locked=True).order_by(
+            'run_at', 'id').values_list('pk', flat=True).first()
+        if job_id is None:
+            return None
+        claimed = available.filter(pk=job_id).update(
+            status=Job.RUNNING, locked_at=now, locked_by=worker,
+            attempts=F('attempts') + 1)
+    if not claimed:
+        return None
+    return Job.objects.get(pk=job_id)
+
+
+def run_job(job):
+    handler = HANDLERS.get(job.name)
+    try:
+        if handler is None:
+            raise PermanentJobError(f'Неизвестная задача {job.name}')
+        handler(**json.loads(job.payload))
+    except Exception as error:
+        logger.exception('Задача %s завершилась с ошибкой', job)
+        fail_job(job, error)
+        return False
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        status=Job.DONE, finished_at=timezone.now(), last_error='')
+    return True
+
+
+def fail_job(job, error):
+    now = timezone.now()
+    last_error = ''.join(traceback.format_exception(
+        type(error), error, error.__traceback__))
+    jobs = Job.objects.filter(pk=job.pk, locked_by=job.locked_by)
+    if (isinstance(error, PermanentJobError)
+            or job.attempts >= job.max_attempts):
+        jobs.update(status=Job.FAILED, finished_at=now,
+                    last_error=last_error)
+        return
+    delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+    jobs.update(status=Job.QUEUED, run_at=now + timedelta(seconds=delay),
+                last_error=last_error)
+
+
+def run_pending(worker=None, limit=None):
+    worker = worker or get_worker_name()
+    processed = 0
+    while limit is None or processed < limit:
+        close_old_connections()
+        job = claim_job(worker)
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def purge_finished(days):
+    return Job.objects.filter(
+        status=Job.DONE,
+        finished_at__lt=timezone.now() - timedelta(days=days)).delete()[0]
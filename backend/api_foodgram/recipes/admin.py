@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Favorite, Ingredient, Recipe, RecipeIngredient, Tag
+from .models import Ingredient, Recipe, RecipeIngredient, RecipeStat, Tag
+from .tag_masks import get_mask
 
 
 class RecipeIngridientsInline(admin.TabularInline):
@@ -24,18 +25,25 @@ class TagAdmin(admin.ModelAdmin):
 
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('pk', 'name', 'author', 'image',
-                    'text', 'cooking_time', 'favorite_count')
+                    'text', 'cooking_time', 'favorites_count',
+                    'in_carts_count')
     search_fields = ('name',)
     list_filter = ('name', 'author',)
     inlines = (RecipeIngridientsInline,)
 
-    def favorite_count(self, obj):
-        result = Favorite.objects.values('recipe_id').filter(
-            recipe=obj).distinct().count()
+    def save_model(self, request, obj, form, change):
+        obj.tags_mask = get_mask(
+            tag.bit for tag in form.cleaned_data.get('tags', []))
+        super().save_model(request, obj, form, change)
 
-        return result
+
+class RecipeStatAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'recipe', 'kind', 'day', 'count')
+    list_filter = ('kind', 'day')
+    raw_id_fields = ('recipe',)
 
 
 admin.site.register(Ingredient, IngredientAdmin)
 admin.site.register(Recipe, RecipeAdmin)
 admin.site.register(Tag, TagAdmin)
+admin.site.register(RecipeStat, RecipeStatAdmin)
@@ -0,0 +1,146 @@
+from functools import partial
+
+from django.db import connection, transaction
+
+from api_foodgram.counts import COUNTS_VERSION
+from api_foodgram.versions import bump_version
+from users.models import Follow, User
+from .cache import viewer_version
+from .counters import change_counters_in_bulk
+from .feed import (add_authors_to_feed, remove_authors_from_feed,
+                   sync_crossed_authors)
+from .models import Favorite, Recipe, ShoppingCart
+from .shopping_list import change_recipes_in_list
+
+ADD = 'add'
+REMOVE = 'remove'
+CREATED = 'created'
+DELETED = 'deleted'
+UNCHANGED = 'unchanged'
+SUPERSEDED = 'superseded'
+ERROR = 'error'
+
+BATCH_TYPES = {
+    'favorite': (Favorite, 'recipe', Recipe),
+    'shopping_cart': (ShoppingCart, 'recipe', Recipe),
+    'subscribe': (Follow, 'author', User),
+}
+
+DOES_NOT_EXIST = 'Объект с id {id} не существует'
+SELF_FOLLOW = 'Нельзя подписаться на самого себя'
+
+INSERT_RETURNING = '''
+    INSERT INTO {table} (user_id, {field}_id)
+    SELECT %s, id FROM {targets} WHERE id IN ({placeholders})
+    ON CONFLICT ({field}_id, user_id) DO NOTHING
+    RETURNING {field}_id
+'''
+
+DELETE_RETURNING = '''
+    DELETE FROM {table} WHERE user_id = %s AND {field}_id IN ({placeholders})
+    RETURNING {field}_id
+'''
+
+
+def get_result(operation, status, error=None):
+    result = dict(operation, status=status)
+    if error is not None:
+        result['error'] = error.format(**operation)
+    return result
+
+
+def plan_operations(user, type_name, items):
+    model, field, target_model = BATCH_TYPES[type_name]
+    ids = {operation['id'] for _, operation in items}
+    found = set(target_model.objects.filter(pk__in=ids).values_list(
+        'pk', flat=True))
+    current = set(model.objects.filter(
+        user=user, **{f'{field}__in': ids}).values_list(
+        f'{field}_id', flat=True))
+    results, added, removed = {}, [], []
+    for index, operation in items:
+        target = operation['id']
+        if target not in found:
+            results[index] = get_result(operation, ERROR, DOES_NOT_EXIST)
+        elif operation['action'] == REMOVE:
+            results[index] = get_result(
+                operation, DELETED if target in current else UNCHANGED)
+            if target in current:
+                removed.append(target)
+        elif model is Follow and target == user.pk:
+            results[index] = get_result(operation, ERROR, SELF_FOLLOW)
+        else:
+            results[index] = get_result(
+                operation, UNCHANGED if target in current else CREATED)
+            if target not in current:
+                added.append(target)
+    return results, added, removed
+
+
+def execute_returning(sql, type_name, user, targets):
+    if not targets:
+        return []
+    model, field, target_model = BATCH_TYPES[type_name]
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(
+            table=model._meta.db_table, field=field,
+            targets=target_model._meta.db_table,
+            placeholders=', '.join(['%s'] * len(targets))),
+            [user.pk, *targets])
+        return [target for target, in cursor.fetchall()]
+
+
+def apply_changes(user, type_name, added, removed):
+    model = BATCH_TYPES[type_name][0]
+    added = execute_returning(INSERT_RETURNING, type_name, user, added)
+    removed = execute_returning(DELETE_RETURNING, type_name, user, removed)
+    change_counters_in_bulk(model, added, 1)
+    change_counters_in_bulk(model, removed, -1)
+    if model is ShoppingCart:
+        signs = dict.fromkeys(added, 1)
+        signs.update(dict.fromkeys(removed, -1))
+        change_recipes_in_list(user.pk, signs)
+    if model is Follow:
+        add_authors_to_feed(user.pk, added)
+        remove_authors_from_feed(user.pk, removed)
+        sync_crossed_authors(added, 1)
+        sync_crossed_authors(removed, -1)
+    return set(added), set(removed)
+
+
+def mark_unchanged(results, added, removed):
+    for result in results.values():
+        if (result['status'] == CREATED and result['id'] not in added
+                or result['status'] == DELETED
+                and result['id'] not in removed):
+            result['status'] = UNCHANGED
+
+
+def apply_operations(user, operations):
+    results, latest = {}, {}
+    for index, operation in enumerate(operations):
+        key = (operation['type'], operation['id'])
+        if key in latest:
+            results[latest[key]] = get_result(
+                operations[latest[key]], SUPERSEDED)
+        latest[key] = index
+    changed = False
+    with transaction.atomic():
+        for type_name in BATCH_TYPES:
+            items = [(index, operations[index])
+                     for (item_type, _), index in latest.items()
+                     if item_type == type_name]
+            if not items:
+                continue
+            planned, added, removed = plan_operations(user, type_name, items)
+            if added or removed:
+                added, removed = apply_changes(
+                    user, type_name, added, removed)
+                mark_unchanged(planned, added, removed)
+                changed = changed or bool(added or removed)
+            results.update(planned)
+        if changed:
+            transaction.on_commit(
+                partial(bump_version, viewer_version(user.pk)))
+            transaction.on_commit(partial(bump_version, COUNTS_VERSION))
+    return [results[index] for index in range(len(operations))]
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch, prefetch_related_objects
+
+from api_foodgram.versions import get_version, get_versions
+from .models import RecipeIngredient, Tag
+
+REPRESENTATION_KEY = 'recipe-representation-2:{}:{}'
+TAG_MAP_KEY = 'tag-map:{}'
+TAGS_VERSION = 'tags'
+INGREDIENTS_VERSION = 'ingredients'
+
+
+def recipe_version(recipe_id):
+    return f'recipe:{recipe_id}'
+
+
+def viewer_version(user_id):
+    return f'viewer:{user_id}'
+
+
+def shopping_list_version(user_id):
+    return f'shopping-list:{user_id}'
+
+
+def get_recipe_prefetches():
+    return (
+        'tags',
+        'author',
+        Prefetch('recipeingredient_set',
+                 queryset=RecipeIngredient.objects.select_related(
+                     'ingredient')),
+    )
+
+
+def get_representation_keys(recipes):
+    names = {TAGS_VERSION, INGREDIENTS_VERSION}
+    for recipe in recipes:
+        names.add(recipe_version(recipe.pk))
+    versions = get_versions(names)
+    keys = {}
+    for recipe in recipes:
+        stamp = '.'.join(str(versions[name]) for name in (
+            recipe_version(recipe.pk),
+            TAGS_VERSION,
+            INGREDIENTS_VERSION,
+        ))
+        keys[recipe.pk] = REPRESENTATION_KEY.format(recipe.pk, stamp)
+    return keys
+
+
+def get_public_representations(recipes, serializer_class):
+    keys = get_representation_keys(recipes)
+    representations = cache.get_many(list(keys.values()))
+    missing = [recipe for recipe in recipes
+               if keys[recipe.pk] not in representations]
+    if missing:
+        prefetch_related_objects(missing, *get_recipe_prefetches())
+        rendered = {
+            keys[recipe.pk]: data for recipe, data in zip(
+                missing, serializer_class(missing, many=True).data)
+        }
+        cache.set_many(rendered, settings.RECIPE_CACHE_TIMEOUT)
+        representations.update(rendered)
+    return [representations[keys[recipe.pk]] for recipe in recipes]
+
+
+def get_tag_map():
+    key = TAG_MAP_KEY.format(get_version(TAGS_VERSION))
+    tag_map = cache.get(key)
+    if tag_map is None:
+        tag_map = dict(Tag.objects.values_list('slug', 'bit'))
+        cache.set(key, tag_map, None)
+    return tag_map
@@ -0,0 +1,61 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import Follow, User
+from .models import Favorite, Recipe, ShoppingCart
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'in_carts_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+)
+
+
+def get_counter_value(field, delta):
+    value = F(field) + delta
+    if delta < 0:
+        value = Greatest(value, 0)
+    return value
+
+
+def change_counter(model, pk, field, delta):
+    model.objects.filter(pk=pk).update(
+        **{field: get_counter_value(field, delta)})
+
+
+def change_counters_in_bulk(related_model, pks, delta):
+    if not pks:
+        return
+    for model, field, counted_model, _ in COUNTERS:
+        if counted_model is related_model:
+            model.objects.filter(pk__in=pks).update(
+                **{field: get_counter_value(field, delta)})
+
+
+def change_counters(instance, delta):
+    for model, field, related_model, related_field in COUNTERS:
+        if isinstance(instance, related_model):
+            change_counter(model, getattr(instance, f'{related_field}_id'),
+                           field, delta)
+
+
+def get_actual_count(related_model, related_field):
+    counts = related_model.objects.filter(
+        **{related_field: OuterRef('pk')}).order_by().values(
+        related_field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts), 0)
+
+
+def repair_counters(check_only=False):
+    drift = {}
+    for model, field, related_model, related_field in COUNTERS:
+        actual = get_actual_count(related_model, related_field)
+        drifted = model.objects.annotate(actual=actual).exclude(
+            **{field: F('actual')})
+        label = f'{model._meta.model_name}.{field}'
+        drift[label] = drifted.count()
+        if drift[label] and not check_only:
+            model.objects.filter(pk__in=drifted.values('pk')).update(
+                **{field: actual})
+    return drift
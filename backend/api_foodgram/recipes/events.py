@@ -0,0 +1,97 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Recipe, RecipeStat
+
+logger = logging.getLogger(__name__)
+
+UPSERT = '''
+    INSERT INTO {table} (recipe_id, kind, day, count)
+    SELECT column1, column2, column3, column4 FROM (VALUES {{values}}) AS batch
+    WHERE column1 IN (SELECT id FROM {recipes})
+    ON CONFLICT (recipe_id, kind, day)
+    DO UPDATE SET count = {table}.count + excluded.count
+'''.format(table=RecipeStat._meta.db_table, recipes=Recipe._meta.db_table)
+
+
+def write_events(counts):
+    rows = [(recipe_id, kind, day, count)
+            for (recipe_id, kind, day), count in counts.items()]
+    batch_size = connection.ops.bulk_batch_size(['row'] * 4, rows)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            values = ', '.join(['(%s, %s, %s, %s)'] * len(batch))
+            cursor.execute(UPSERT.format(values=values),
+                           [value for row in batch for value in row])
+
+
+class EventBuffer:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.pending = 0
+        self.timer = None
+
+    def add(self, recipe_id, kind):
+        key = (recipe_id, kind, timezone.now().date())
+        with self.lock:
+            self.counts[key] += 1
+            self.pending += 1
+            self.schedule()
+            due = self.pending >= settings.RECIPE_EVENTS_BATCH_SIZE
+        if due:
+            self.flush()
+
+    def schedule(self):
+        if self.timer is None:
+            self.timer = threading.Timer(
+                settings.RECIPE_EVENTS_FLUSH_INTERVAL, self.flush_in_thread)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush_in_thread(self):
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            self.pending = 0
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not counts:
+            return
+        try:
+            write_events(counts)
+        except DatabaseError:
+            logger.exception('Не удалось записать события рецептов')
+            with self.lock:
+                self.counts.update(counts)
+                self.schedule()
+
+
+buffer = EventBuffer()
+atexit.register(buffer.flush)
+
+
+def record_event(recipe_id, kind):
+    buffer.add(recipe_id, kind)
+
+
+def get_recipe_stats(recipe_id):
+    totals = dict.fromkeys((kind for kind, _ in RecipeStat.KINDS), 0)
+    totals.update(RecipeStat.objects.filter(recipe_id=recipe_id).values_list(
+        'kind').annotate(total=Sum('count')).order_by())
+    return totals
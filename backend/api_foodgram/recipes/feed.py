@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.db import connection, connections
+
+from jobs.queue import enqueue
+from users.models import Follow, User
+from .models import FeedItem, Recipe
+
+SYNC_AUTHOR_FEED_JOB = 'recipes.sync_author_feed'
+
+INSERT = '''
+    INSERT INTO {feed} (user_id, recipe_id, author_id)
+    SELECT {{user}}, recipe.id, recipe.author_id
+    FROM {recipes} AS recipe
+    JOIN {users} AS author ON author.id = recipe.author_id
+    {{join}}
+    WHERE {{where}} AND author.followers_count <= %s
+    ON CONFLICT (user_id, recipe_id) DO NOTHING
+'''.format(feed=FeedItem._meta.db_table, recipes=Recipe._meta.db_table,
+           users=User._meta.db_table)
+
+FOLLOW_JOIN = (f'JOIN {Follow._meta.db_table} AS follow '
+               f'ON follow.author_id = recipe.author_id')
+
+
+def insert_feed_items(user, join, where, params):
+    sql = INSERT.format(user=user, join=join, where=where)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*params, settings.FEED_FANOUT_MAX_FOLLOWERS])
+
+
+def get_placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def fan_out_recipes(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    if recipe_ids:
+        insert_feed_items(
+            'follow.user_id', FOLLOW_JOIN,
+            f'recipe.id IN ({get_placeholders(recipe_ids)})', recipe_ids)
+
+
+def add_authors_to_feed(user_id, author_ids):
+    author_ids = list(author_ids)
+    if author_ids:
+        insert_feed_items(
+            '%s', '',
+            f'recipe.author_id IN ({get_placeholders(author_ids)})',
+            [user_id, *author_ids])
+
+
+def remove_authors_from_feed(user_id, author_ids):
+    FeedItem.objects.filter(user_id=user_id,
+                            author_id__in=author_ids).delete()
+
+
+def sync_author_feed(author_id):
+    followers_count = User.objects.filter(pk=author_id).values_list(
+        'followers_count', flat=True).first()
+    if followers_count is None:
+        return
+    if followers_count > settings.FEED_FANOUT_MAX_FOLLOWERS:
+        FeedItem.objects.filter(author_id=author_id).delete()
+    else:
+        insert_feed_items('follow.user_id', FOLLOW_JOIN,
+                          'recipe.author_id = %s', [author_id])
+
+
+def sync_crossed_authors(author_ids, delta):
+    if not author_ids:
+        return
+    threshold = settings.FEED_FANOUT_MAX_FOLLOWERS
+    crossed = User.objects.filter(
+        pk__in=author_ids,
+        followers_count=threshold + 1 if delta > 0 else threshold)
+    for author_id in crossed.values_list('pk', flat=True):
+        enqueue(SYNC_AUTHOR_FEED_JOB, author_id=author_id)
+
+
+def rebuild_feeds():
+    FeedItem.objects.all().delete()
+    insert_feed_items('follow.user_id', FOLLOW_JOIN, '1 = 1', [])
+    return FeedItem.objects.count()
+
+
+def get_feed_ids(user, before, limit):
+    timeline = FeedItem.objects.filter(user=user).values_list(
+        'recipe_id', flat=True).order_by()
+    merged = Recipe.objects.filter(
+        author__following__user=user,
+        author__followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).values_list('id', flat=True).order_by()
+    if before is not None:
+        timeline = timeline.filter(recipe_id__lt=before)
+        merged = merged.filter(pk__lt=before)
+    features = connections[timeline.db].features
+    if features.supports_slicing_ordering_in_compound:
+        timeline = timeline.order_by('-recipe_id')[:limit]
+        merged = merged.order_by('-id')[:limit]
+    return list(timeline.union(merged).order_by('-recipe_id')[:limit])
@@ -1,35 +1,108 @@
-import base64
-import imghdr
+import os
+import tempfile
 import uuid
 
 import six
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from api_foodgram.storage import PENDING_DIR
+from .images import (ImageDecodeError, decode_base64, read_image_header,
+                     split_data_url)
+
+
+class StoredImageName(str):
+    width = height = size = None
 
 
 class Base64ImageField(serializers.ImageField):
+    default_error_messages = {
+        'max_size': 'Картинка больше {max_size} МБ',
+        'max_pixels': 'Картинка больше {max_pixels} мегапикселей',
+    }
 
     def to_internal_value(self, data):
+        if not isinstance(data, six.string_types):
+            return super().to_internal_value(data)
+        data = split_data_url(data)
+        content = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        try:
+            decode_base64(data, content, settings.IMAGE_MAX_BYTES)
+            extension, width, height = read_image_header(
+                content, settings.IMAGE_MAX_PIXELS)
+        except ImageDecodeError as error:
+            content.close()
+            self.fail_image(error.code)
+        size = content.seek(0, 2)
+        content.seek(0)
+        stored = StoredImageName(default_storage.get_hashed_name(
+            f'image.{extension}', File(content)))
+        if default_storage.reuse(stored):
+            content.close()
+            stored.width, stored.height, stored.size = width, height, size
+            return stored
+        file = File(content, name=os.path.join(
+            PENDING_DIR, f'{uuid.uuid4().hex}.{extension}'))
+        file.width, file.height, file.size = width, height, size
+        return serializers.FileField.to_internal_value(self, file)
 
-        if isinstance(data, six.string_types):
-            if 'data:' in data and ';base64,' in data:
-                header, data = data.split(';base64,')
+    def fail_image(self, code):
+        self.fail(code, max_size=f'{settings.IMAGE_MAX_BYTES / 2 ** 20:g}',
+                  max_pixels=f'{settings.IMAGE_MAX_PIXELS / 10 ** 6:g}')
 
-            try:
-                decoded_file = base64.b64decode(data)
-            except TypeError:
-                self.fail('invalid_image')
 
-            file_name = str(uuid.uuid4())[:12]
-            file_extension = self.get_file_extension(file_name, decoded_file)
-            complete_file_name = "%s.%s" % (file_name, file_extension, )
-            data = ContentFile(decoded_file, name=complete_file_name)
+class BulkManyRelatedField(serializers.ManyRelatedField):
 
+    def to_internal_value(self, data):
+        if not isinstance(data, str) and hasattr(data, '__iter__'):
+            self.child_relation.resolve(data)
         return super().to_internal_value(data)
 
-    def get_file_extension(self, file_name, decoded_file):
 
-        extension = imghdr.what(file_name, decoded_file)
-        extension = 'jpg' if extension == 'jpeg' else extension
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    resolved = None
 
-        return extension
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+    def to_pk(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, ValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+    def resolve(self, values):
+        pks = set()
+        for value in values:
+            try:
+                pks.add(self.to_pk(value))
+            except serializers.ValidationError:
+                continue
+        resolved = self.resolved or {}
+        missing = pks.difference(resolved)
+        if missing:
+            resolved.update(dict.fromkeys(missing))
+            resolved.update(self.get_queryset().in_bulk(missing))
+        self.resolved = resolved
+
+    def to_internal_value(self, data):
+        if self.resolved is None:
+            return super().to_internal_value(data)
+        instance = self.resolved.get(self.to_pk(data))
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
@@ -1,11 +1,19 @@
 from django_filters.rest_framework import FilterSet, filters
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import BaseFilterBackend, SearchFilter
 
+from .cache import get_tag_map
 from .models import Recipe
+from .search import search_recipes
+from .tag_masks import filter_by_tags_mask, get_mask
+
+
+def get_tag_choices():
+    return [(slug, slug) for slug in get_tag_map()]
 
 
 class RecipeFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.MultipleChoiceFilter(choices=get_tag_choices,
+                                        method='filter_tags')
     author = filters.NumberFilter(
         field_name='author__id'
     )
@@ -20,14 +28,30 @@ class RecipeFilter(FilterSet):
                   'author', 'is_favorited',
                   'is_in_shopping_cart')
 
+    def filter_tags(self, queryset, name, value):
+        tag_map = get_tag_map()
+        return filter_by_tags_mask(
+            queryset, get_mask(tag_map[slug] for slug in value),
+            get_mask(tag_map.values()))
+
     def filter_is_favorited(self, queryset, name, value):
         if value:
-            return queryset.filter(favourited__user=self.request.user)
+            return queryset.filter(is_favorited=True)
+        return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if value:
-            return queryset.filter(cart__user=self.request.user)
+            return queryset.filter(is_in_shopping_cart=True)
+        return queryset
 
 
 class IngredientFilter(SearchFilter):
     search_param = 'name'
+
+
+class RecipeSearchFilter(BaseFilterBackend):
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        return search_recipes(queryset, query)
@@ -0,0 +1,94 @@
+import base64
+import binascii
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image
+
+from jobs.queue import enqueue
+from .models import Recipe
+from .thumbnails import delete_variants
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+DECODE_CHUNK_SIZE = 64 * 1024
+RELEASE_IMAGES_JOB = 'recipes.release_images'
+
+
+class ImageDecodeError(ValueError):
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+def split_data_url(data):
+    if 'data:' in data and ';base64,' in data:
+        return data.split(';base64,', 1)[1]
+    return data
+
+
+def get_decoded_size(data):
+    return len(data) // 4 * 3 - data[-2:].count('=')
+
+
+def decode_base64(data, file, max_bytes):
+    data = ''.join(data.split())
+    if get_decoded_size(data) > max_bytes:
+        raise ImageDecodeError('max_size')
+    try:
+        for start in range(0, len(data), DECODE_CHUNK_SIZE):
+            file.write(base64.b64decode(
+                data[start:start + DECODE_CHUNK_SIZE], validate=True))
+    except (binascii.Error, ValueError):
+        raise ImageDecodeError('invalid_image')
+    file.seek(0)
+
+
+def read_image_header(file, max_pixels):
+    try:
+        with Image.open(file) as image:
+            image_format, (width, height) = image.format, image.size
+    except Exception:
+        raise ImageDecodeError('invalid_image')
+    if image_format not in EXTENSIONS:
+        raise ImageDecodeError('invalid_image')
+    if width * height > max_pixels:
+        raise ImageDecodeError('max_pixels')
+    file.seek(0)
+    return EXTENSIONS[image_format], width, height
+
+
+def verify_image(file):
+    try:
+        with Image.open(file) as image:
+            image.load()
+    except Exception:
+        raise ImageDecodeError('invalid_image')
+    file.seek(0)
+
+
+def is_recently_used(name, grace):
+    try:
+        modified = default_storage.get_modified_time(name)
+    except FileNotFoundError:
+        return False
+    return timezone.now() - modified < grace
+
+
+def release_images(names):
+    names = set(names) - {''}
+    referenced = set(Recipe.objects.filter(image__in=names).values_list(
+        'image', flat=True))
+    grace = timedelta(seconds=settings.IMAGE_RELEASE_GRACE)
+    deferred = []
+    for name in names - referenced:
+        if is_recently_used(name, grace):
+            deferred.append(name)
+            continue
+        default_storage.delete(name)
+        delete_variants(name)
+    if deferred:
+        enqueue(RELEASE_IMAGES_JOB, run_at=timezone.now() + grace,
+                names=deferred)
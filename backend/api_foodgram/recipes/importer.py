@@ -0,0 +1,205 @@
+import json
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, transaction
+from rest_framework import serializers
+
+from api_foodgram.counts import COUNTS_VERSION
+from api_foodgram.versions import bump_version
+from users.models import User
+from .counters import change_counter
+from .feed import fan_out_recipes
+from .fields import Base64ImageField
+from .images import (ImageDecodeError, decode_base64, read_image_header,
+                     release_images, split_data_url, verify_image)
+from .models import Recipe, RecipeIngredient
+from .search import update_search_index
+from .serializers import RecipeCreateSerializer
+from .tag_masks import get_mask
+
+BATCH_SIZE = 500
+
+
+def decode_image(data, max_bytes, max_pixels):
+    file = BytesIO()
+    try:
+        decode_base64(split_data_url(data), file, max_bytes)
+        image = read_image_header(file, max_pixels)
+        verify_image(file)
+    except ImageDecodeError as error:
+        return None, error.code
+    return (file.getvalue(),) + image, None
+
+
+class RecipeImportSerializer(RecipeCreateSerializer):
+    image = serializers.CharField()
+
+
+class RecipeImporter:
+
+    def __init__(self, author, workers=None, batch_size=BATCH_SIZE):
+        self.author = author
+        self.workers = workers
+        self.batch_size = batch_size
+        self.image_field = Base64ImageField()
+        self.created = self.failed = 0
+        self.started = time.perf_counter()
+
+    @property
+    def summary(self):
+        seconds = time.perf_counter() - self.started
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'seconds': round(seconds, 3),
+            'per_second': round(self.created / seconds, 1) if seconds else 0,
+        }
+
+    def run(self, lines):
+        if self.workers == 0:
+            yield from self.run_batches(lines, map)
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            yield from self.run_batches(
+                lines, partial(pool.map, chunksize=16))
+
+    def run_batches(self, lines, decode):
+        batch = []
+        for number, line in enumerate(lines, 1):
+            if isinstance(line, bytes):
+                line = line.decode('utf-8', errors='replace')
+            if not line.strip():
+                continue
+            batch.append((number, line))
+            if len(batch) >= self.batch_size:
+                yield from self.import_batch(batch, decode)
+                batch = []
+        if batch:
+            yield from self.import_batch(batch, decode)
+
+    def import_batch(self, batch, decode):
+        statuses = {}
+        items = self.parse_lines(batch, statuses)
+        valid = self.validate_items(items, statuses)
+        images = decode(
+            partial(decode_image, max_bytes=settings.IMAGE_MAX_BYTES,
+                    max_pixels=settings.IMAGE_MAX_PIXELS),
+            [data['image'] for _, data in valid])
+        rows = []
+        for (number, data), (image, error) in zip(valid, images):
+            if error is not None:
+                statuses[number] = self.error(
+                    number, {'image': [self.get_image_error(error)]})
+                continue
+            rows.append((number, data, image))
+        statuses.update(self.save_rows(rows))
+        for number, _ in batch:
+            yield statuses[number]
+
+    def parse_lines(self, batch, statuses):
+        items = []
+        for number, line in batch:
+            try:
+                item = json.loads(line)
+            except ValueError as error:
+                statuses[number] = self.error(number, str(error))
+                continue
+            if not isinstance(item, dict):
+                statuses[number] = self.error(number, 'Ожидался объект')
+                continue
+            items.append((number, item))
+        return items
+
+    def validate_items(self, items, statuses):
+        serializer = self.get_serializer(item for _, item in items)
+        valid = []
+        for number, item in items:
+            try:
+                valid.append((number, serializer.run_validation(item)))
+            except serializers.ValidationError as error:
+                statuses[number] = self.error(number, error.detail)
+        return valid
+
+    def get_serializer(self, items):
+        serializer = RecipeImportSerializer()
+        tags, ingredients = set(), set()
+        for item in items:
+            if isinstance(item.get('tags'), list):
+                tags.update(tag for tag in item['tags']
+                            if isinstance(tag, (int, str)))
+            if isinstance(item.get('ingredients'), list):
+                ingredients.update(
+                    ingredient.get('id') for ingredient in item['ingredients']
+                    if isinstance(ingredient, dict)
+                    and isinstance(ingredient.get('id'), (int, str)))
+        serializer.fields['tags'].child_relation.resolve(tags)
+        serializer.fields['ingredients'].child.fields['id'].resolve(
+            ingredients)
+        return serializer
+
+    def save_rows(self, rows):
+        if not rows:
+            return {}
+        names = []
+        try:
+            with transaction.atomic():
+                recipes = []
+                for _, data, image in rows:
+                    content, extension, width, height = image
+                    name = default_storage.save(
+                        f'{str(uuid.uuid4())[:12]}.{extension}',
+                        ContentFile(content))
+                    names.append(name)
+                    recipes.append(Recipe(
+                        author=self.author, image=name, name=data['name'],
+                        text=data['text'], cooking_time=data['cooking_time'],
+                        image_width=width, image_height=height,
+                        image_size=len(content),
+                        tags_mask=get_mask(tag.bit for tag in data['tags'])))
+                Recipe.objects.bulk_create(recipes)
+                change_counter(User, self.author.pk, 'recipes_count',
+                               len(recipes))
+                if recipes[0].pk is None:
+                    ids = Recipe.objects.order_by('-pk').values_list(
+                        'pk', flat=True)[:len(recipes)]
+                    for recipe, pk in zip(recipes, reversed(ids)):
+                        recipe.pk = pk
+                RecipeIngredient.objects.bulk_create(
+                    RecipeIngredient(recipe=recipe,
+                                     ingredient=ingredient['id'],
+                                     amount=ingredient['amount'])
+                    for recipe, (_, data, _) in zip(recipes, rows)
+                    for ingredient in data['ingredients'])
+                Recipe.tags.through.objects.bulk_create(
+                    Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag.pk)
+                    for recipe, (_, data, _) in zip(recipes, rows)
+                    for tag in data['tags'])
+                recipe_ids = [recipe.pk for recipe in recipes]
+                fan_out_recipes(recipe_ids)
+                transaction.on_commit(
+                    partial(update_search_index, recipe_ids))
+                transaction.on_commit(partial(bump_version, COUNTS_VERSION))
+        except DatabaseError as error:
+            release_images(names)
+            return {number: self.error(number, str(error))
+                    for number, _, _ in rows}
+        self.created += len(recipes)
+        return {number: {'line': number, 'status': 'created', 'id': pk}
+                for (number, _, _), pk in zip(rows, recipe_ids)}
+
+    def get_image_error(self, code):
+        try:
+            self.image_field.fail_image(code)
+        except serializers.ValidationError as error:
+            return error.detail[0]
+
+    def error(self, number, errors):
+        self.failed += 1
+        return {'line': number, 'status': 'error', 'errors': errors}
@@ -0,0 +1,150 @@
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+from array import array
+
+from django.conf import settings
+
+from api_foodgram.versions import bump_version
+from .cache import INGREDIENTS_VERSION
+from .models import Ingredient
+
+MAGIC = b'FGI1'
+HEADER = struct.Struct('<4sIId')
+FIELD_SEPARATOR = b'\x1f'
+RECORD_SEPARATOR = b'\n'
+
+_index = None
+
+
+def normalize(value):
+    value = value.casefold().replace('ё', 'е')
+    return ' '.join(value.split())
+
+
+def _clean(value):
+    return re.sub(r'[\x1f\n\r]', ' ', value)
+
+
+def _encode_record(key, pk, name, unit):
+    return FIELD_SEPARATOR.join(
+        (key.encode(), str(pk).encode(), _clean(name).encode(),
+         _clean(unit).encode())
+    ) + RECORD_SEPARATOR
+
+
+def build_ingredient_index(path=None):
+    path = path or settings.INGREDIENT_INDEX_PATH
+    names, words = [], []
+    queryset = Ingredient.objects.values_list(
+        'id', 'name', 'measurement_unit')
+    for pk, name, unit in queryset.iterator():
+        key = normalize(name)
+        if not key:
+            continue
+        names.append((key.encode(), pk, name, unit))
+        for word in key.split(' ')[1:]:
+            words.append((word.encode(), pk, name, unit))
+    names.sort()
+    words.sort()
+
+    offsets = array('I')
+    data = bytearray()
+    for key, pk, name, unit in names + words:
+        offsets.append(len(data))
+        data += _encode_record(key.decode(), pk, name, unit)
+    header = HEADER.pack(MAGIC, len(names), len(offsets), time.time())
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(descriptor, 'wb') as file:
+        file.write(header)
+        file.write(offsets.tobytes())
+        file.write(data)
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, path)
+    return len(names)
+
+
+class IngredientIndex:
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.signature = self.get_signature(os.fstat(file.fileno()))
+            self.buffer = mmap.mmap(file.fileno(), 0,
+                                    access=mmap.ACCESS_READ)
+        magic, self.names_count, self.count, self.built_at = (
+            HEADER.unpack_from(self.buffer, 0))
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not an ingredient index')
+        offsets_end = HEADER.size + self.count * array('I').itemsize
+        self.offsets = memoryview(self.buffer)[HEADER.size:offsets_end]
+        self.offsets = self.offsets.cast('I')
+        self.data_start = offsets_end
+
+    @staticmethod
+    def get_signature(stat):
+        return stat.st_ino, stat.st_mtime_ns
+
+    def key_at(self, position):
+        start = self.data_start + self.offsets[position]
+        end = self.buffer.find(FIELD_SEPARATOR, start)
+        return self.buffer[start:end]
+
+    def record_at(self, position):
+        start = self.data_start + self.offsets[position]
+        end = self.buffer.find(RECORD_SEPARATOR, start)
+        _, pk, name, unit = self.buffer[start:end].split(FIELD_SEPARATOR)
+        return {'id': int(pk), 'name': name.decode(),
+                'measurement_unit': unit.decode()}
+
+    def lower_bound(self, key, low, high):
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def search(self, query, limit):
+        key = normalize(query).encode()
+        if not key:
+            return []
+        results, seen = [], set()
+        sections = ((0, self.names_count), (self.names_count, self.count))
+        for low, high in sections:
+            position = self.lower_bound(key, low, high)
+            while position < high and len(results) < limit:
+                if not self.key_at(position).startswith(key):
+                    break
+                record = self.record_at(position)
+                if record['id'] not in seen:
+                    seen.add(record['id'])
+                    results.append(record)
+                position += 1
+        return results
+
+
+def get_ingredient_index():
+    global _index
+    try:
+        stat = os.stat(settings.INGREDIENT_INDEX_PATH)
+    except FileNotFoundError:
+        return None
+    signature = IngredientIndex.get_signature(stat)
+    if _index is None or _index.signature != signature:
+        _index = IngredientIndex(settings.INGREDIENT_INDEX_PATH)
+    return _index
+
+
+def rebuild_ingredient_index(scheduled_at):
+    index = get_ingredient_index()
+    if index is not None and index.built_at >= scheduled_at:
+        return
+    build_ingredient_index()
+    bump_version(INGREDIENTS_VERSION)
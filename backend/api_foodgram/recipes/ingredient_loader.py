@@ -0,0 +1,150 @@
+import csv
+import io
+import json
+import time
+
+from django.db import connections, transaction
+
+from .ingredient_index import rebuild_ingredient_index
+from .models import Ingredient
+
+BATCH_SIZE = 5000
+READ_SIZE = 1 << 16
+CSV_HEADER = ('name', 'measurement_unit')
+
+POSTGRES_STAGING = '''
+    CREATE TEMPORARY TABLE ingredient_staging (
+        name varchar(250), measurement_unit varchar(20)
+    ) ON COMMIT DROP
+'''
+POSTGRES_COPY = '''
+    COPY ingredient_staging (name, measurement_unit)
+    FROM STDIN WITH (FORMAT csv)
+'''
+POSTGRES_UPSERT = '''
+    INSERT INTO recipes_ingredient (name, measurement_unit)
+    SELECT DISTINCT staging.name, staging.measurement_unit
+    FROM ingredient_staging AS staging
+    WHERE NOT EXISTS (
+        SELECT 1 FROM recipes_ingredient AS ingredient
+        WHERE ingredient.name = staging.name
+            AND ingredient.measurement_unit = staging.measurement_unit)
+'''
+
+
+def normalize_value(value):
+    return ' '.join(str(value).split()).lower()
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if len(row) < 2 or tuple(row[:2]) == CSV_HEADER:
+            continue
+        yield row[0], row[1]
+
+
+def read_json(file):
+    decoder = json.JSONDecoder()
+    buffer, position = '', 0
+    while True:
+        chunk = file.read(READ_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in '[,] \t\r\n':
+                position += 1
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                break
+            yield item['name'], item['measurement_unit']
+        if not chunk:
+            if buffer[position:].strip():
+                raise ValueError('Некорректный JSON в конце файла')
+            return
+
+
+READERS = {'csv': read_csv, 'json': read_json}
+
+
+def normalize_rows(rows):
+    for name, measurement_unit in rows:
+        name = normalize_value(name)
+        measurement_unit = normalize_value(measurement_unit)
+        if name and measurement_unit:
+            yield name[:250], measurement_unit[:20]
+
+
+class RowsFile(io.TextIOBase):
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.buffer = ''
+        self.count = 0
+
+    def read(self, size=-1):
+        output = io.StringIO()
+        writer = csv.writer(output)
+        while size < 0 or len(self.buffer) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.count += 1
+            writer.writerow(row)
+            self.buffer += output.getvalue()
+            output.seek(0)
+            output.truncate()
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def load_postgres(rows, connection):
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRES_STAGING)
+            rows_file = RowsFile(rows)
+            cursor.copy_expert(POSTGRES_COPY, rows_file)
+            cursor.execute(POSTGRES_UPSERT)
+            return rows_file.count, cursor.rowcount
+
+
+def load_chunks(rows, connection):
+    queryset = Ingredient.objects.using(connection.alias)
+    existing = set(queryset.values_list(
+        'name', 'measurement_unit').iterator())
+    read = created = 0
+    chunk = []
+    for row in rows:
+        read += 1
+        if row not in existing:
+            existing.add(row)
+            chunk.append(row)
+        if len(chunk) >= BATCH_SIZE:
+            created += load_chunk(chunk, queryset)
+            chunk = []
+    if chunk:
+        created += load_chunk(chunk, queryset)
+    return read, created
+
+
+def load_chunk(chunk, queryset):
+    with transaction.atomic(using=queryset.db):
+        queryset.bulk_create(
+            Ingredient(name=name, measurement_unit=measurement_unit)
+            for name, measurement_unit in chunk)
+    return len(chunk)
+
+
+def load_ingredients(file, file_format, using='default'):
+    started = time.time()
+    connection = connections[using]
+    rows = normalize_rows(READERS[file_format](file))
+    if connection.vendor == 'postgresql':
+        read, created = load_postgres(rows, connection)
+    else:
+        read, created = load_chunks(rows, connection)
+    if created:
+        rebuild_ingredient_index(started)
+    return read, created, time.time() - started
@@ -0,0 +1,46 @@
+import os
+
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from api_foodgram.versions import bump_version
+from jobs.queue import PermanentJobError, job
+from .cache import recipe_version
+from .feed import SYNC_AUTHOR_FEED_JOB, sync_author_feed
+from .images import RELEASE_IMAGES_JOB, release_images
+from .models import Recipe
+from .thumbnails import PRUNE_VARIANTS_JOB, prune_variants
+
+PROCESS_IMAGE_JOB = 'recipes.process_image'
+
+
+@job(PROCESS_IMAGE_JOB)
+def process_image(recipe_id, image):
+    if not Recipe.objects.filter(pk=recipe_id, image=image).exists():
+        release_images([image])
+        return
+    try:
+        with default_storage.open(image) as file, Image.open(file) as picture:
+            picture.load()
+    except Exception as error:
+        raise PermanentJobError(f'Картинка {image} повреждена') from error
+    with default_storage.open(image) as file:
+        name = default_storage.save(os.path.basename(image), file)
+    if Recipe.objects.filter(pk=recipe_id, image=image).update(image=name):
+        bump_version(recipe_version(recipe_id))
+    release_images([image, name])
+
+
+@job(RELEASE_IMAGES_JOB)
+def release_images_job(names):
+    release_images(names)
+
+
+@job(PRUNE_VARIANTS_JOB)
+def prune_image_variants():
+    prune_variants()
+
+
+@job(SYNC_AUTHOR_FEED_JOB)
+def sync_author_feed_job(author_id):
+    sync_author_feed(author_id)
@@ -0,0 +1,94 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from recipes.search import search_recipes, update_search_index
+from users.models import User
+
+SYLLABLES = ('ка', 'ро', 'ми', 'ту', 'ле', 'со', 'вы', 'на', 'пе', 'жу',
+             'бо', 'ри', 'да', 'гу', 'ше', 'лё')
+BATCH_SIZE = 5000
+
+
+def make_word(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+class Command(BaseCommand):
+    help = ('Замеряет полнотекстовый поиск рецептов на синтетическом '
+            'каталоге. Данные создаются в транзакции и откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [make_word(rng) for _ in range(5000)]
+        with transaction.atomic():
+            self.populate(rng, vocabulary, options)
+            queries = [rng.choice(vocabulary)[:rng.randint(3, 6)]
+                       for _ in range(options['queries'])]
+            self.report('search', self.measure(
+                queries, lambda query: search_recipes(
+                    Recipe.objects.all(), query)))
+            self.report('icontains', self.measure(
+                queries, lambda query: Recipe.objects.filter(
+                    Q(name__icontains=query) | Q(text__icontains=query))))
+            transaction.set_rollback(True)
+
+    def populate(self, rng, vocabulary, options):
+        started = time.perf_counter()
+        author = User.objects.create(username='benchmark',
+                                     email='benchmark@example.com')
+        Ingredient.objects.bulk_create(
+            Ingredient(name=' '.join(rng.sample(vocabulary, 2)),
+                       measurement_unit='г')
+            for _ in range(options['ingredients']))
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        for start in range(0, options['recipes'], BATCH_SIZE):
+            size = min(BATCH_SIZE, options['recipes'] - start)
+            Recipe.objects.bulk_create(
+                Recipe(author=author, image='benchmark.png', cooking_time=10,
+                       name=' '.join(rng.sample(vocabulary, 3)),
+                       text=' '.join(rng.choices(vocabulary, k=40)))
+                for _ in range(size))
+        recipe_ids = list(Recipe.objects.filter(
+            author=author).values_list('id', flat=True))
+        for start in range(0, len(recipe_ids), BATCH_SIZE):
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe_id=recipe_id,
+                                 ingredient_id=ingredient_id, amount=1)
+                for recipe_id in recipe_ids[start:start + BATCH_SIZE]
+                for ingredient_id in rng.sample(ingredient_ids, 5))
+        populated = time.perf_counter()
+        update_search_index()
+        indexed = time.perf_counter()
+        self.stdout.write(
+            f'Каталог: {options["recipes"]} рецептов, '
+            f'{populated - started:.1f} с; '
+            f'индекс: {indexed - populated:.1f} с')
+
+    def measure(self, queries, build_queryset):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            queryset = build_queryset(query)
+            list(queryset[:6])
+            queryset.order_by().values('pk').count()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def report(self, name, timings):
+        timings.sort()
+        self.stdout.write(
+            f'{name}: p50 {statistics.median(timings):.1f} мс, '
+            f'p95 {timings[int(len(timings) * 0.95) - 1]:.1f} мс, '
+            f'max {timings[-1]:.1f} мс')
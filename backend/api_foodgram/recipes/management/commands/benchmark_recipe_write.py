@@ -0,0 +1,75 @@
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Ingredient, ShoppingCart, Tag
+from recipes.serializers import RecipeCreateSerializer
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Считает SQL-запросы и время создания и изменения рецепта '
+            'в зависимости от числа ингредиентов. Данные откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,10,30')
+        parser.add_argument('--repeats', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        with transaction.atomic():
+            author = User.objects.create(username='benchmark',
+                                         email='benchmark@example.com')
+            serializer = RecipeCreateSerializer(
+                context={'request': SimpleNamespace(user=author)})
+            Ingredient.objects.bulk_create(
+                Ingredient(name=f'benchmark {number}', measurement_unit='г')
+                for number in range(max(sizes) * 2))
+            ingredients = list(Ingredient.objects.filter(
+                name__startswith='benchmark '))
+            tags = list(Tag.objects.all()[:3])
+            for size in sizes:
+                created, updated = [], []
+                for _ in range(options['repeats']):
+                    data = self.make_data(rng, ingredients, tags, size)
+                    recipe, measured = self.measure(serializer.create, data)
+                    created.append(measured)
+                    ShoppingCart.objects.create(user=author, recipe=recipe)
+                    data = self.make_data(rng, ingredients, tags, size)
+                    _, measured = self.measure(
+                        lambda data: serializer.update(recipe, data), data)
+                    updated.append(measured)
+                self.report(f'create, {size} ингр.', created)
+                self.report(f'update, {size} ингр.', updated)
+            transaction.set_rollback(True)
+
+    def make_data(self, rng, ingredients, tags, size):
+        return {
+            'name': 'benchmark', 'text': 'benchmark', 'cooking_time': 10,
+            'image': 'benchmark.png',
+            'tags': rng.sample(tags, min(len(tags), 2)),
+            'ingredients': [
+                {'id': ingredient, 'amount': rng.randint(1, 3)}
+                for ingredient in rng.sample(ingredients, size)],
+        }
+
+    def measure(self, write, data):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            result = write(data)
+            elapsed = (time.perf_counter() - started) * 1000
+        return result, (len(queries), elapsed)
+
+    def report(self, name, measured):
+        statements = sorted(count for count, _ in measured)
+        timings = [elapsed for _, elapsed in measured]
+        self.stdout.write(
+            f'{name}: запросов {statements[0]}-{statements[-1]}, '
+            f'p50 {statistics.median(timings):.1f} мс')
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api_foodgram.versions import bump_version
+from recipes.cache import INGREDIENTS_VERSION
+from recipes.ingredient_index import build_ingredient_index
+
+
+class Command(BaseCommand):
+    help = 'Собирает индекс для поиска ингредиентов по началу названия'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=settings.INGREDIENT_INDEX_PATH)
+
+    def handle(self, *args, **options):
+        count = build_ingredient_index(options['path'])
+        bump_version(INGREDIENTS_VERSION)
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс собран: {count} ингредиентов в {options["path"]}'))
@@ -0,0 +1,44 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api_foodgram.versions import bump_version
+from recipes.cache import recipe_version
+from recipes.images import release_images
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Переносит картинки рецептов в хранилище по хешу содержимого '
+            'и удаляет ставшие ненужными копии')
+
+    def handle(self, *args, **options):
+        moved = missing = 0
+        previous_names = set()
+        recipes = Recipe.objects.exclude(image='').only('image')
+        for recipe in recipes.iterator():
+            name = recipe.image.name
+            if name in previous_names:
+                continue
+            if not default_storage.exists(name):
+                missing += 1
+                continue
+            with default_storage.open(name) as file:
+                hashed_name = default_storage.save(name, file)
+            if hashed_name == name:
+                continue
+            with transaction.atomic():
+                recipes_with_image = Recipe.objects.filter(image=name)
+                recipe_ids = list(recipes_with_image.values_list(
+                    'pk', flat=True))
+                recipes_with_image.update(image=hashed_name)
+            for recipe_id in recipe_ids:
+                bump_version(recipe_version(recipe_id))
+            previous_names.add(name)
+            moved += 1
+        release_images(previous_names)
+        files = len(set(Recipe.objects.exclude(image='').values_list(
+            'image', flat=True)))
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено: {moved}, файлов не найдено: {missing}, '
+            f'уникальных файлов: {files}'))
@@ -0,0 +1,45 @@
+import json
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.importer import BATCH_SIZE, RecipeImporter
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Импортирует рецепты из NDJSON: по одному рецепту в формате '
+            'API на строку, картинка в base64')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл NDJSON или - для stdin')
+        parser.add_argument('--author', required=True,
+                            help='username автора рецептов')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Процессы для разбора картинок, 0 - без пула')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--errors-only', action='store_true')
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options['author'])
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {options["author"]} не найден')
+        importer = RecipeImporter(author, options['workers'],
+                                  options['batch_size'])
+        if options['path'] == '-':
+            self.import_lines(importer, sys.stdin, options)
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                self.import_lines(importer, lines, options)
+        summary = importer.summary
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: {summary["created"]}, ошибок: {summary["failed"]}, '
+            f'{summary["seconds"]} с, {summary["per_second"]} рецептов/с'))
+
+    def import_lines(self, importer, lines, options):
+        for status in importer.run(lines):
+            if options['errors_only'] and status['status'] != 'error':
+                continue
+            self.stdout.write(json.dumps(status, ensure_ascii=False))
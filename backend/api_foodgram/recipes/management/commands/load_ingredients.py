@@ -0,0 +1,35 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.ingredient_loader import READERS, load_ingredients
+
+
+class Command(BaseCommand):
+    help = ('Загружает каталог ингредиентов из CSV (название, единица) '
+            'или JSON. Уже существующие ингредиенты пропускаются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл каталога или - для stdin')
+        parser.add_argument('--format', choices=sorted(READERS),
+                            help='По умолчанию определяется по расширению')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(
+            path)[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError('Укажите --format: csv или json')
+        if path == '-':
+            result = load_ingredients(sys.stdin, file_format,
+                                      options['database'])
+        else:
+            with open(path, encoding='utf-8-sig', newline='') as file:
+                result = load_ingredients(file, file_format,
+                                          options['database'])
+        read, created, seconds = result
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано: {read}, добавлено: {created}, '
+            f'пропущено: {read - created}, {seconds:.1f} с'))
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.thumbnails import prune_variants
+
+
+class Command(BaseCommand):
+    help = ('Удаляет давно не открывавшиеся уменьшенные копии картинок, '
+            'пока кеш не уложится в лимит')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-bytes', type=int,
+                            default=settings.IMAGE_VARIANT_CACHE_BYTES)
+
+    def handle(self, *args, **options):
+        removed = prune_variants(options['max_bytes'])
+        self.stdout.write(f'Удалено копий: {removed}')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = ('Заново заполняет все ленты подписок. Авторов, пересёкших '
+            'порог FEED_FANOUT_MAX_FOLLOWERS, фоновые задачи досчитывают '
+            'сами; команда нужна только для ремонта')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_feeds()
+        self.stdout.write(self.style.SUCCESS(f'Записей в лентах: {count}'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.counters import repair_counters
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики избранного, списков покупок, рецептов '
+            'и подписчиков и исправляет расхождения')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Только проверить, ничего не меняя')
+
+    def handle(self, *args, **options):
+        drift = repair_counters(check_only=options['check'])
+        report = ', '.join(f'{label}: {count}'
+                           for label, count in drift.items())
+        if options['check'] and any(drift.values()):
+            raise CommandError(f'Расхождения в счётчиках: {report}')
+        self.stdout.write(self.style.SUCCESS(f'Расхождений: {report}'))
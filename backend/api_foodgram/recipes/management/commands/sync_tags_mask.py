@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api_foodgram.counts import COUNTS_VERSION
+from api_foodgram.versions import bump_version
+from recipes.models import Tag
+from recipes.tag_masks import sync_tags_masks
+
+
+class Command(BaseCommand):
+    help = ('Сверяет маски тегов рецептов с таблицей связей и '
+            'исправляет расхождения')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Только проверить, ничего не меняя')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            if Tag.objects.filter(bit=None).exists():
+                raise CommandError('Есть теги без бита в маске')
+            drift = sync_tags_masks(check_only=True)
+            if drift:
+                raise CommandError(f'Расхождений: {drift}')
+            self.stdout.write(self.style.SUCCESS('Маски тегов в порядке'))
+            return
+        for tag in Tag.objects.filter(bit=None).order_by('id'):
+            tag.save()
+        drift = sync_tags_masks()
+        if drift:
+            bump_version(COUNTS_VERSION)
+        self.stdout.write(self.style.SUCCESS(f'Исправлено масок: {drift}'))
@@ -0,0 +1,75 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:08
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+FTS_TABLE = 'recipes_recipe_fts'
+GIN_INDEX = 'recipes_recipe_search_gin'
+
+POSTGRES_UPDATE = '''
+    UPDATE recipes_recipe AS recipe SET search_vector =
+        setweight(to_tsvector(%(config)s, replace(
+            lower(recipe.name), 'ё', 'е')), 'A')
+        || setweight(to_tsvector(%(config)s, replace(lower(coalesce((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipes_recipeingredient AS item
+            JOIN recipes_ingredient AS ingredient
+                ON ingredient.id = item.ingredient_id
+            WHERE item.recipe_id = recipe.id), '')), 'ё', 'е')), 'B')
+        || setweight(to_tsvector(%(config)s, replace(
+            lower(recipe.text), 'ё', 'е')), 'C')
+'''
+
+SQLITE_INSERT = f'''
+    INSERT INTO {FTS_TABLE} (rowid, name, ingredients, text)
+    SELECT recipe.id,
+           replace(replace(recipe.name, 'Ё', 'Е'), 'ё', 'е'),
+           replace(replace(coalesce(group_concat(ingredient.name, ' '), ''),
+                           'Ё', 'Е'), 'ё', 'е'),
+           replace(replace(recipe.text, 'Ё', 'Е'), 'ё', 'е')
+    FROM recipes_recipe AS recipe
+    LEFT JOIN recipes_recipeingredient AS item ON item.recipe_id = recipe.id
+    LEFT JOIN recipes_ingredient AS ingredient
+        ON ingredient.id = item.ingredient_id
+    GROUP BY recipe.id
+'''
+
+
+def build_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {GIN_INDEX} '
+                           f'ON recipes_recipe USING gin (search_vector)')
+            cursor.execute(POSTGRES_UPDATE,
+                           {'config': settings.SEARCH_CONFIG})
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+                           f'USING fts5(name, ingredients, text)')
+            cursor.execute(SQLITE_INSERT)
+
+
+def remove_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {GIN_INDEX}')
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0018_auto_20220125_0816'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(build_search_index, remove_search_index),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:16
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def fill_tags_masks(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Tag = apps.get_model('recipes', 'Tag')
+    for bit, tag in enumerate(Tag.objects.order_by('id')):
+        Tag.objects.filter(pk=tag.pk).update(bit=bit)
+    masks = defaultdict(int)
+    rows = Recipe.tags.through.objects.values_list('recipe_id', 'tag__bit')
+    for recipe_id, bit in rows.iterator():
+        masks[recipe_id] |= 1 << bit
+    recipes = defaultdict(list)
+    for recipe_id, mask in masks.items():
+        recipes[mask].append(recipe_id)
+    for mask, recipe_ids in recipes.items():
+        Recipe.objects.filter(pk__in=recipe_ids).update(tags_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0019_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tags_mask',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, verbose_name='Маска тегов'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='bit',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, unique=True, verbose_name='Бит в маске тегов'),
+        ),
+        migrations.RunPython(fill_tags_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:28
+
+from django.db import migrations, models
+from PIL import Image
+
+
+def fill_image_metadata(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    for recipe in Recipe.objects.exclude(image='').iterator():
+        try:
+            with recipe.image.open('rb') as file:
+                with Image.open(file) as image:
+                    width, height = image.size
+            size = recipe.image.size
+        except Exception:
+            continue
+        Recipe.objects.filter(pk=recipe.pk).update(
+            image_width=width, image_height=height, image_size=size)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0021_shoppinglistitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_height',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Высота картинки'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_size',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Размер картинки, байт'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_width',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Ширина картинки'),
+        ),
+        migrations.RunPython(fill_image_metadata, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0024_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStat',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('view', 'Просмотр'), ('share', 'Поделились'), ('print', 'Печать')], max_length=10, verbose_name='Событие')),
+                ('day', models.DateField(verbose_name='День')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='recipes.Recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Статистика рецепта',
+                'verbose_name_plural': 'Статистика рецептов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='recipestat',
+            constraint=models.UniqueConstraint(fields=('recipe', 'kind', 'day'), name='unique_recipe_stat'),
+        ),
+    ]
@@ -1,32 +1,112 @@
-from django.shortcuts import get_object_or_404
-from rest_framework import status
+import hashlib
+
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import serializers, status
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from api_foodgram.versions import get_last_modified, get_versions
+from users.serializers import RecipeEasyRetrieveSerializer
+from .models import Recipe
+
+INSERT_IGNORE = '''
+    INSERT INTO {table} (user_id, recipe_id)
+    SELECT %s, id FROM {recipes} WHERE id = %s
+    ON CONFLICT (recipe_id, user_id) DO NOTHING
+'''
+
+DELETE = 'DELETE FROM {table} WHERE user_id = %s AND recipe_id = %s'
 
 
 class AddDeleteListMixin:
-    serializer_class = None
     model_class = None
+    duplicate_message = None
 
+    def execute(self, sql, instance):
+        sql = sql.format(table=self.model_class._meta.db_table,
+                         recipes=Recipe._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [instance.user_id, instance.recipe_id])
+            return cursor.rowcount > 0
+
+    @transaction.atomic
     def post(self, request, recipe_id):
-        recipe_id = recipe_id
-        user = request.user.id
-        data = {"user": user, "recipe": recipe_id}
-        serializer = self.serializer_class(
-            data=data,
-            context={"request": request},
-        )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.only(
+            'id', 'name', 'image', 'cooking_time').filter(
+            pk=recipe_id).first()
+        if recipe is None:
+            error = serializers.PrimaryKeyRelatedField.default_error_messages[
+                'does_not_exist']
+            raise serializers.ValidationError(
+                {'recipe': [error.format(pk_value=recipe_id)]},
+                code='does_not_exist')
+        instance = self.model_class(user_id=request.user.id,
+                                    recipe_id=recipe_id)
+        if not self.execute(INSERT_IGNORE, instance):
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [self.duplicate_message]},
+                code='unique')
+        post_save.send(sender=self.model_class, instance=instance,
+                       created=True, update_fields=None, raw=False,
+                       using=connection.alias)
+        return Response(RecipeEasyRetrieveSerializer(recipe).data,
+                        status.HTTP_201_CREATED)
 
+    @transaction.atomic
     def delete(self, request, recipe_id):
-        recipe_id = recipe_id
-        user = request.user
-        obj = get_object_or_404(
-            self.model_class, user=user, recipe__id=recipe_id
-        )
-        obj.delete()
+        instance = self.model_class(user_id=request.user.id,
+                                    recipe_id=recipe_id)
+        if not self.execute(DELETE, instance):
+            raise Http404
+        post_delete.send(sender=self.model_class, instance=instance,
+                         using=connection.alias)
         model_title = self.model_class._meta.verbose_name.title()
         return Response(
             f"Успешно удалено: {model_title}!", status.HTTP_204_NO_CONTENT
         )
+
+
+class ConditionalGetMixin:
+    conditional_actions = ('list', 'retrieve')
+    version_names = ()
+
+    def get_version_names(self):
+        return self.version_names
+
+    def get_etag(self, versions):
+        signature = ':'.join(
+            [self.request.get_full_path(),
+             self.request.accepted_renderer.format]
+            + [f'{name}={version}' for name, version in sorted(
+                versions.items())]
+        )
+        return '"%s"' % hashlib.md5(signature.encode()).hexdigest()
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        if self.action not in self.conditional_actions:
+            return handler(request, *args, **kwargs)
+        names = self.get_version_names()
+        last_modified = get_last_modified(names)
+        etag = self.get_etag(get_versions(names))
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs)
@@ -1,9 +1,14 @@
 # Ff
 
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError
 from django.db import models
 
+from api_foodgram.mixins import CounterFieldsMixin
 from users.models import User
 
+MAX_TAGS = 63
+
 
 class Ingredient(models.Model):
     name = models.CharField(max_length=250,
@@ -29,6 +34,10 @@ class Tag(models.Model):
 
     slug = models.SlugField(unique=True, verbose_name='slug')
 
+    bit = models.PositiveSmallIntegerField(unique=True, null=True,
+                                           editable=False,
+                                           verbose_name='Бит в маске тегов')
+
     class Meta:
         indexes = [models.Index(fields=['name', ])]
         verbose_name = 'Тег'
@@ -37,8 +46,23 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def mask(self):
+        return 1 << self.bit
+
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            used = set(Tag.objects.exclude(bit=None).values_list(
+                'bit', flat=True))
+            free = [bit for bit in range(MAX_TAGS) if bit not in used]
+            if not free:
+                raise ValidationError(
+                    f'Нельзя создать больше {MAX_TAGS} тегов')
+            self.bit = free[0]
+        super().save(*args, **kwargs)
 
-class Recipe(models.Model):
+
+class Recipe(CounterFieldsMixin, models.Model):
     name = models.CharField(max_length=250,
                             verbose_name='Название рецепта')
     ingredients = models.ManyToManyField(Ingredient,
@@ -51,14 +75,39 @@ class Recipe(models.Model):
 
     tags = models.ManyToManyField(Tag, verbose_name='Тэги')
 
-    image = models.FileField(verbose_name='Картинка')
+    image = models.FileField(db_index=True, verbose_name='Картинка')
+
+    image_width = models.PositiveIntegerField(
+        null=True, editable=False, verbose_name='Ширина картинки')
+
+    image_height = models.PositiveIntegerField(
+        null=True, editable=False, verbose_name='Высота картинки')
+
+    image_size = models.PositiveIntegerField(
+        null=True, editable=False, verbose_name='Размер картинки, байт')
 
     text = models.TextField(verbose_name='Текст рецепта')
 
     cooking_time = models.IntegerField(verbose_name='Время приготовления')
 
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    tags_mask = models.BigIntegerField(default=0, db_index=True,
+                                       editable=False,
+                                       verbose_name='Маска тегов')
+
+    favorites_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='В избранном')
+
+    in_carts_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='В списках покупок')
+
+    counter_fields = ('favorites_count', 'in_carts_count')
+
     class Meta:
         ordering = ('-id',)
+        indexes = [models.Index(fields=['favorites_count', 'id'],
+                                name='recipe_favorites_count_id')]
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
@@ -110,3 +159,72 @@ class RecipeIngredient(models.Model):
 
     def __str__(self):
         return f'{self.ingredient} {self.recipe}'
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='shopping_list',
+                             verbose_name='Пользователь')
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE,
+                                   verbose_name='Ингредиент')
+    amount = models.IntegerField(verbose_name='Количество ингредиента')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'ingredient'],
+            name='unique_shopping_list_item')]
+        verbose_name = 'Список покупок'
+        verbose_name_plural = 'Списки покупок'
+
+    def __str__(self):
+        return f'{self.ingredient} {self.amount}'
+
+
+class RecipeStat(models.Model):
+    VIEW = 'view'
+    SHARE = 'share'
+    PRINT = 'print'
+    KINDS = (
+        (VIEW, 'Просмотр'),
+        (SHARE, 'Поделились'),
+        (PRINT, 'Печать'),
+    )
+    INTERACTIONS = (SHARE, PRINT)
+
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE,
+                               related_name='stats',
+                               verbose_name='Рецепт')
+    kind = models.CharField(max_length=10, choices=KINDS,
+                            verbose_name='Событие')
+    day = models.DateField(verbose_name='День')
+    count = models.PositiveIntegerField(default=0, verbose_name='Количество')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['recipe', 'kind', 'day'],
+            name='unique_recipe_stat')]
+        verbose_name = 'Статистика рецепта'
+        verbose_name_plural = 'Статистика рецептов'
+
+    def __str__(self):
+        return f'{self.recipe_id} {self.kind} {self.day}: {self.count}'
+
+
+class FeedItem(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='feed',
+                             verbose_name='Подписчик')
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE,
+                               related_name='+',
+                               verbose_name='Рецепт')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='+',
+                               verbose_name='Автор рецепта')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'recipe'],
+            name='unique_feed_item')]
+        indexes = [models.Index(fields=['user', 'author'])]
+        verbose_name = 'Лента подписок'
+        verbose_name_plural = 'Ленты подписок'
@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q
+
+from .ingredient_index import normalize
+
+FTS_TABLE = 'recipes_recipe_fts'
+GIN_INDEX = 'recipes_recipe_search_gin'
+SQLITE_CHUNK_SIZE = 500
+
+POSTGRES_UPDATE = '''
+    UPDATE recipes_recipe AS recipe SET search_vector =
+        setweight(to_tsvector(%(config)s, replace(
+            lower(recipe.name), 'ё', 'е')), 'A')
+        || setweight(to_tsvector(%(config)s, replace(lower(coalesce((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipes_recipeingredient AS item
+            JOIN recipes_ingredient AS ingredient
+                ON ingredient.id = item.ingredient_id
+            WHERE item.recipe_id = recipe.id), '')), 'ё', 'е')), 'B')
+        || setweight(to_tsvector(%(config)s, replace(
+            lower(recipe.text), 'ё', 'е')), 'C')
+'''
+
+SQLITE_DELETE = f'DELETE FROM {FTS_TABLE}'
+
+SQLITE_INSERT = f'''
+    INSERT INTO {FTS_TABLE} (rowid, name, ingredients, text)
+    SELECT recipe.id,
+           replace(replace(recipe.name, 'Ё', 'Е'), 'ё', 'е'),
+           replace(replace(coalesce(group_concat(ingredient.name, ' '), ''),
+                           'Ё', 'Е'), 'ё', 'е'),
+           replace(replace(recipe.text, 'Ё', 'Е'), 'ё', 'е')
+    FROM recipes_recipe AS recipe
+    LEFT JOIN recipes_recipeingredient AS item ON item.recipe_id = recipe.id
+    LEFT JOIN recipes_ingredient AS ingredient
+        ON ingredient.id = item.ingredient_id
+'''
+
+SQLITE_RANK = f'-bm25({FTS_TABLE}, 10.0, 4.0, 1.0)'
+
+
+def create_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {GIN_INDEX} '
+                           f'ON recipes_recipe USING gin (search_vector)')
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+                           f'USING fts5(name, ingredients, text)')
+
+
+def drop_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {GIN_INDEX}')
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def update_search_index(recipe_ids=None, using='default'):
+    connection = connections[using]
+    if recipe_ids is not None:
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            params = {'config': settings.SEARCH_CONFIG, 'ids': recipe_ids}
+            where = '' if recipe_ids is None else (
+                ' WHERE recipe.id = ANY(%(ids)s)')
+            cursor.execute(POSTGRES_UPDATE + where, params)
+        elif connection.vendor == 'sqlite':
+            if recipe_ids is None:
+                cursor.execute(SQLITE_DELETE)
+                cursor.execute(SQLITE_INSERT + ' GROUP BY recipe.id')
+                return
+            for start in range(0, len(recipe_ids), SQLITE_CHUNK_SIZE):
+                chunk = recipe_ids[start:start + SQLITE_CHUNK_SIZE]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(
+                    f'{SQLITE_DELETE} WHERE rowid IN ({placeholders})', chunk)
+                cursor.execute(
+                    f'{SQLITE_INSERT} WHERE recipe.id IN ({placeholders}) '
+                    f'GROUP BY recipe.id', chunk)
+
+
+def delete_from_search_index(recipe_ids, using='default'):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    recipe_ids = list(recipe_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(recipe_ids), SQLITE_CHUNK_SIZE):
+            chunk = recipe_ids[start:start + SQLITE_CHUNK_SIZE]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f'{SQLITE_DELETE} WHERE rowid IN ({placeholders})', chunk)
+
+
+def get_sqlite_match(query):
+    return ' '.join('"%s"*' % token.replace('"', '""')
+                    for token in query.split())
+
+
+def search_recipes(queryset, query):
+    query = normalize(query)
+    if not query:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        search_query = SearchQuery(query, config=settings.SEARCH_CONFIG)
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-search_rank', '-id')
+    if vendor == 'sqlite':
+        return queryset.extra(
+            select={'search_rank': SQLITE_RANK},
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = recipes_recipe.id',
+                   f'{FTS_TABLE} MATCH %s'],
+            params=[get_sqlite_match(query)],
+        ).order_by('-search_rank', '-id')
+    return queryset.filter(
+        Q(name__icontains=query) | Q(text__icontains=query)
+        | Q(ingredients__name__icontains=query)
+    ).distinct()
@@ -1,12 +1,25 @@
+import os
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
 
-from users.models import User
-from users.serializers import (CustomUserSerializer,
-                               RecipeEasyRetrieveSerializer)
-from .fields import Base64ImageField
-from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                     ShoppingCart, Tag)
+from users.models import Follow
+from users.serializers import CustomUserSerializer
+from api_foodgram.storage import PENDING_DIR
+from api_foodgram.versions import bump_version
+from jobs.queue import enqueue
+from .batch import ADD, BATCH_TYPES, REMOVE
+from .cache import get_public_representations, recipe_version
+from .fields import Base64ImageField, BulkPrimaryKeyRelatedField
+from .jobs import PROCESS_IMAGE_JOB
+from .models import (MAX_TAGS, Favorite, Ingredient, Recipe,
+                     RecipeIngredient, RecipeStat, ShoppingCart,
+                     ShoppingListItem, Tag)
+from .shopping_list import change_ingredients_in_lists
+from .tag_masks import get_mask
+from .thumbnails import get_variant_url
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -22,6 +35,13 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'color', 'slug')
         model = Tag
 
+    def validate(self, data):
+        if self.instance is None and Tag.objects.count() >= MAX_TAGS:
+            raise serializers.ValidationError(
+                f'Нельзя создать больше {MAX_TAGS} тегов'
+            )
+        return data
+
 
 class RecipeIngredientsRetrieveSerializer(serializers.ModelSerializer):
     amount = serializers.IntegerField()
@@ -36,8 +56,28 @@ class RecipeIngredientsRetrieveSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit')
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
+class RecipeCreateIngridientListSerializer(serializers.ListSerializer):
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.child.fields['id'].resolve(
+                item.get('id') for item in data if isinstance(item, dict))
+        return super().to_internal_value(data)
+
+
 class RecipeCreateIngridientSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = BulkPrimaryKeyRelatedField(queryset=Ingredient.objects.all())
     amount = serializers.IntegerField()
 
     class Meta:
@@ -46,29 +86,83 @@ class RecipeCreateIngridientSerializer(serializers.ModelSerializer):
             'id',
             'amount'
         )
+        list_serializer_class = RecipeCreateIngridientListSerializer
 
 
-class RecipeRetrieveSerializer(serializers.ModelSerializer):
+class RecipePublicSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     author = CustomUserSerializer(read_only=True)
-    ingredients = serializers.SerializerMethodField(read_only=True)
-    is_favorited = serializers.SerializerMethodField(read_only=True)
-    is_in_shopping_cart = serializers.SerializerMethodField(read_only=True)
+    ingredients = RecipeIngredientsRetrieveSerializer(
+        source='recipeingredient_set', many=True, read_only=True)
     image = serializers.SerializerMethodField()
+    image_small = serializers.SerializerMethodField()
+    image_medium = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'name', 'tags', 'author', 'ingredients',
-            'image', 'text', 'cooking_time', 'is_favorited',
-            'is_in_shopping_cart',
+            'image', 'image_small', 'image_medium', 'text', 'cooking_time',
         )
 
-    def get_ingredients(self, obj):
-        queryset = RecipeIngredient.objects.filter(recipe=obj)
-        return RecipeIngredientsRetrieveSerializer(queryset, many=True).data
+    def get_image(self, obj):
+        return obj.image.url
+
+    def get_image_small(self, obj):
+        return get_variant_url(obj.image.name, 'small')
+
+    def get_image_medium(self, obj):
+        return get_variant_url(obj.image.name, 'medium')
+
+
+class RecipeRetrieveListSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        recipes = list(data.all() if hasattr(data, 'all') else data)
+        representations = get_public_representations(
+            recipes, RecipePublicSerializer)
+        return [self.child.add_user_flags(representation, recipe)
+                for representation, recipe in zip(representations, recipes)]
+
+
+class RecipeRetrieveSerializer(RecipePublicSerializer):
+    is_favorited = serializers.SerializerMethodField(read_only=True)
+    is_in_shopping_cart = serializers.SerializerMethodField(read_only=True)
+
+    class Meta:
+        model = Recipe
+        fields = RecipePublicSerializer.Meta.fields + (
+            'is_favorited', 'is_in_shopping_cart',
+        )
+        list_serializer_class = RecipeRetrieveListSerializer
+
+    def to_representation(self, instance):
+        representation = get_public_representations(
+            [instance], RecipePublicSerializer)[0]
+        return self.add_user_flags(representation, instance)
+
+    def add_user_flags(self, representation, instance):
+        representation = dict(representation)
+        representation['author'] = dict(
+            representation['author'],
+            is_subscribed=self.get_is_subscribed(instance))
+        representation['is_favorited'] = self.get_is_favorited(instance)
+        representation['is_in_shopping_cart'] = (
+            self.get_is_in_shopping_cart(instance))
+        return representation
+
+    def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        request = self.context.get('request')
+        if not request or request.user.is_anonymous:
+            return False
+        return Follow.objects.filter(user=request.user,
+                                     author=obj.author_id).exists()
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
@@ -76,19 +170,18 @@ class RecipeRetrieveSerializer(serializers.ModelSerializer):
                                        recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
         return ShoppingCart.objects.filter(
             user=request.user, recipe=obj).exists()
 
-    def get_image(self, obj):
-        return obj.image.url
-
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
-    tags = serializers.PrimaryKeyRelatedField(queryset=Tag.objects.all(),
-                                              many=True)
+    tags = BulkPrimaryKeyRelatedField(queryset=Tag.objects.all(),
+                                      many=True)
     ingredients = RecipeCreateIngridientSerializer(many=True)
     author = CustomUserSerializer(read_only=True)
     image = Base64ImageField()
@@ -99,30 +192,83 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
                   'name', 'text', 'cooking_time')
 
     def create_ingredients(self, ingredients, recipe):
-        for ingredient in ingredients:
-            RecipeIngredient.objects.create(
-                recipe=recipe, ingredient=ingredient['id'],
-                amount=ingredient['amount'])
-
-    def create_tags(self, tags, recipe):
-        for tag in tags:
-            recipe.tags.add(tag)
-
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient['id'],
+                             amount=ingredient['amount'])
+            for ingredient in ingredients)
+
+    def update_ingredients(self, ingredients, recipe):
+        amounts = {ingredient['id'].pk: ingredient['amount']
+                   for ingredient in ingredients}
+        current = {item.ingredient_id: item for item in
+                   RecipeIngredient.objects.filter(recipe=recipe)}
+        changes, changed, removed = {}, [], []
+        for ingredient_id, item in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is None:
+                changes[ingredient_id] = -item.amount
+                removed.append(item.pk)
+            elif amount != item.amount:
+                changes[ingredient_id] = amount - item.amount
+                item.amount = amount
+                changed.append(item)
+        added = [RecipeIngredient(recipe=recipe, ingredient_id=ingredient_id,
+                                  amount=amount)
+                 for ingredient_id, amount in amounts.items()
+                 if ingredient_id not in current]
+        changes.update((item.ingredient_id, item.amount) for item in added)
+        if removed:
+            placeholders = ', '.join(['%s'] * len(removed))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {RecipeIngredient._meta.db_table} '
+                    f'WHERE id IN ({placeholders})', removed)
+        RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        RecipeIngredient.objects.bulk_create(added)
+        change_ingredients_in_lists(recipe.pk, changes)
+
+    def add_image_metadata(self, validated_data):
+        image = validated_data.get('image')
+        if getattr(image, 'size', None) is not None:
+            validated_data.update(
+                image_width=getattr(image, 'width', None),
+                image_height=getattr(image, 'height', None),
+                image_size=image.size)
+
+    def enqueue_image_processing(self, recipe, validated_data):
+        if (validated_data.get('image') is not None
+                and os.path.dirname(recipe.image.name) == PENDING_DIR):
+            enqueue(PROCESS_IMAGE_JOB, recipe_id=recipe.pk,
+                    image=recipe.image.name)
+
+    @transaction.atomic
     def create(self, validated_data):
         author = self.context.get('request').user
+        self.add_image_metadata(validated_data)
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
-        recipe = Recipe.objects.create(author=author, **validated_data)
-        self.create_tags(tags, recipe)
+        recipe = Recipe.objects.create(
+            author=author, tags_mask=get_mask(tag.bit for tag in tags),
+            **validated_data)
+        recipe.tags.add(*tags)
         self.create_ingredients(ingredients, recipe)
+        self.enqueue_image_processing(recipe, validated_data)
+        transaction.on_commit(
+            partial(bump_version, recipe_version(recipe.pk)))
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.tags.clear()
-        RecipeIngredient.objects.filter(recipe=instance).delete()
-        self.create_tags(validated_data.pop('tags'), instance)
-        self.create_ingredients(validated_data.pop('ingredients'), instance)
-        return super().update(instance, validated_data)
+        self.add_image_metadata(validated_data)
+        tags = validated_data.pop('tags')
+        instance.tags.set(tags)
+        instance.tags_mask = get_mask(tag.bit for tag in tags)
+        self.update_ingredients(validated_data.pop('ingredients'), instance)
+        transaction.on_commit(
+            partial(bump_version, recipe_version(instance.pk)))
+        recipe = super().update(instance, validated_data)
+        self.enqueue_image_processing(recipe, validated_data)
+        return recipe
 
     def to_representation(self, instance):
         request = self.context.get('request')
@@ -162,39 +308,25 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         return data
 
 
-class FavoriteCreateSerializer(serializers.ModelSerializer):
-    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
-    recipe = serializers.PrimaryKeyRelatedField(queryset=Recipe.objects.all())
+class RecipeEventSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=RecipeStat.INTERACTIONS)
 
-    class Meta:
-        model = Favorite
-        fields = ('user', 'recipe')
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Favorite.objects.all(),
-                fields=('user', 'recipe'),
-                message='Нельзя добавить рецепт в избранное дважды'
-            )
-        ]
-
-    def to_representation(self, instance):
-        return RecipeEasyRetrieveSerializer(instance.recipe).data
 
+class BatchOperationSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=list(BATCH_TYPES))
+    action = serializers.ChoiceField(choices=(ADD, REMOVE))
+    id = serializers.IntegerField(min_value=1)
 
-class ShoppingCartCreateSerializer(serializers.ModelSerializer):
-    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
-    recipe = serializers.PrimaryKeyRelatedField(queryset=Recipe.objects.all())
 
-    class Meta:
-        model = ShoppingCart
-        fields = ('user', 'recipe')
-        validators = [
-            UniqueTogetherValidator(
-                queryset=ShoppingCart.objects.all(),
-                fields=('user', 'recipe'),
-                message='Нельзя добавить рецепт в корзину дважды'
-            )
-        ]
+class BatchSerializer(serializers.Serializer):
+    operations = BatchOperationSerializer(many=True, allow_empty=False)
 
-    def to_representation(self, instance):
-        return RecipeEasyRetrieveSerializer(instance.recipe).data
+    def to_internal_value(self, data):
+        operations = data.get('operations') if isinstance(data, dict) else None
+        if (isinstance(operations, list)
+                and len(operations) > settings.BATCH_MAX_OPERATIONS):
+            raise serializers.ValidationError({'operations': [
+                f'Не больше {settings.BATCH_MAX_OPERATIONS} операций '
+                f'за один запрос'
+            ]})
+        return super().to_internal_value(data)
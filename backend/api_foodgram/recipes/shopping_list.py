@@ -0,0 +1,121 @@
+import csv
+import glob
+import os
+import tempfile
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.template.loader import render_to_string
+from xhtml2pdf import pisa
+
+from api_foodgram.versions import bump_version, get_versions
+from .cache import INGREDIENTS_VERSION, shopping_list_version
+from .models import RecipeIngredient, ShoppingCart, ShoppingListItem
+
+CSV_HEADER = ('Ингредиент', 'Количество', 'Единица измерения')
+
+UPSERT = '''
+    INSERT INTO {table} (user_id, ingredient_id, amount) VALUES (%s, %s, %s)
+    ON CONFLICT (user_id, ingredient_id)
+    DO UPDATE SET amount = {table}.amount + excluded.amount
+'''.format(table=ShoppingListItem._meta.db_table)
+
+
+def change_shopping_lists(rows):
+    rows = [row for row in rows if row[2]]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(UPSERT, rows)
+    user_ids = {user_id for user_id, _, _ in rows}
+    ShoppingListItem.objects.filter(
+        user_id__in=user_ids, amount__lte=0).delete()
+    for user_id in user_ids:
+        bump_version(shopping_list_version(user_id))
+
+
+def change_recipe_in_list(user_id, recipe_id, sign):
+    change_recipes_in_list(user_id, {recipe_id: sign})
+
+
+def change_recipes_in_list(user_id, signs):
+    if not signs:
+        return
+    amounts = Counter()
+    ingredients = RecipeIngredient.objects.filter(
+        recipe_id__in=signs).values_list(
+        'recipe_id', 'ingredient_id', 'amount')
+    for recipe_id, ingredient_id, amount in ingredients:
+        amounts[ingredient_id] += signs[recipe_id] * amount
+    change_shopping_lists(
+        (user_id, ingredient_id, amount)
+        for ingredient_id, amount in amounts.items())
+
+
+def change_ingredients_in_lists(recipe_id, amounts):
+    if not any(amounts.values()):
+        return
+    user_ids = ShoppingCart.objects.filter(
+        recipe_id=recipe_id).values_list('user_id', flat=True)
+    change_shopping_lists(
+        (user_id, ingredient_id, amount) for user_id in user_ids
+        for ingredient_id, amount in amounts.items())
+
+
+def get_shopping_list(user):
+    return user.shopping_list.select_related('ingredient').order_by(
+        'ingredient__name')
+
+
+def iter_shopping_list_txt(items):
+    for item in items.iterator():
+        yield (f'{item.ingredient.name}: {item.amount} '
+               f'{item.ingredient.measurement_unit}\n')
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+def iter_shopping_list_csv(items):
+    writer = csv.writer(Echo())
+    yield '\ufeff' + writer.writerow(CSV_HEADER)
+    for item in items.iterator():
+        yield writer.writerow((item.ingredient.name, item.amount,
+                               item.ingredient.measurement_unit))
+
+
+def render_shopping_list_pdf(items, path):
+    html = render_to_string('recipes/shopping_list.html', {
+        'items': items, 'font': settings.SHOPPING_LIST_PDF_FONT})
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(descriptor, 'wb') as file:
+        pisa.CreatePDF(html, dest=file, encoding='utf-8',
+                       path=settings.SHOPPING_LIST_PDF_FONT)
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, path)
+
+
+def open_shopping_list_pdf(user):
+    versions = get_versions([shopping_list_version(user.pk),
+                             INGREDIENTS_VERSION])
+    prefix = os.path.join(settings.SHOPPING_LIST_PDF_DIR, f'{user.pk}-')
+    path = prefix + '-'.join(str(version) for _, version in sorted(
+        versions.items())) + '.pdf'
+    try:
+        return open(path, 'rb')
+    except FileNotFoundError:
+        pass
+    render_shopping_list_pdf(get_shopping_list(user), path)
+    for stale_path in glob.glob(prefix + '*.pdf'):
+        if stale_path != path:
+            try:
+                os.remove(stale_path)
+            except FileNotFoundError:
+                pass
+    return open(path, 'rb')
@@ -0,0 +1,234 @@
+import time
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from api_foodgram.counts import COUNTS_VERSION
+from api_foodgram.versions import bump_version
+from users.models import Follow, User
+from .cache import (INGREDIENTS_VERSION, TAGS_VERSION, recipe_version,
+                    viewer_version)
+from .counters import change_counter, change_counters
+from .feed import (add_authors_to_feed, fan_out_recipes,
+                   remove_authors_from_feed, sync_crossed_authors)
+from .images import release_images
+from .ingredient_index import rebuild_ingredient_index
+from .models import (Favorite, FeedItem, Ingredient, Recipe,
+                     RecipeIngredient, ShoppingCart, Tag)
+from .search import delete_from_search_index, update_search_index
+from .shopping_list import change_ingredients_in_lists, change_recipe_in_list
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_counts(sender, **kwargs):
+    bump_version(COUNTS_VERSION)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    bump_version(recipe_version(instance.pk))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def invalidate_recipe_ingredients(sender, instance, **kwargs):
+    bump_version(recipe_version(instance.recipe_id))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_version(recipe_version(instance.pk))
+        return
+    if pk_set is None:
+        bump_version(TAGS_VERSION)
+        return
+    for recipe_id in pk_set:
+        bump_version(recipe_version(recipe_id))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    bump_version(TAGS_VERSION)
+
+
+@receiver(post_delete, sender=Tag)
+def clear_tag_bit(sender, instance, **kwargs):
+    if instance.bit is None:
+        return
+    Recipe.objects.filter(tags_mask__gt=0).update(
+        tags_mask=F('tags_mask').bitand(~instance.mask))
+    bump_version(COUNTS_VERSION)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    bump_version(INGREDIENTS_VERSION)
+    transaction.on_commit(partial(rebuild_ingredient_index, time.time()))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(sender, instance, created, update_fields=None,
+                      **kwargs):
+    if created or update_fields and set(update_fields) <= {'last_login'}:
+        return
+    for recipe_id in instance.recipes.values_list('pk', flat=True):
+        bump_version(recipe_version(recipe_id))
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_viewer(sender, instance, **kwargs):
+    bump_version(viewer_version(instance.user_id))
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, **kwargs):
+    transaction.on_commit(partial(update_search_index, [instance.pk]))
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_recipe(sender, instance, **kwargs):
+    transaction.on_commit(partial(delete_from_search_index, [instance.pk]))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def index_recipe_ingredients(sender, instance, **kwargs):
+    transaction.on_commit(
+        partial(update_search_index, [instance.recipe_id]))
+
+
+@receiver(post_save, sender=Ingredient)
+def index_ingredient_recipes(sender, instance, created, **kwargs):
+    if created:
+        return
+    recipe_ids = list(RecipeIngredient.objects.filter(
+        ingredient=instance).values_list('recipe_id', flat=True))
+    transaction.on_commit(partial(update_search_index, recipe_ids))
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    if created:
+        change_recipe_in_list(instance.user_id, instance.recipe_id, 1)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    change_recipe_in_list(instance.user_id, instance.recipe_id, -1)
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def remove_old_ingredient_from_lists(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    old = RecipeIngredient.objects.filter(pk=instance.pk).values_list(
+        'recipe_id', 'ingredient_id', 'amount').first()
+    if old is not None:
+        recipe_id, ingredient_id, amount = old
+        change_ingredients_in_lists(recipe_id, {ingredient_id: -amount})
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def add_ingredient_to_lists(sender, instance, **kwargs):
+    change_ingredients_in_lists(instance.recipe_id,
+                                {instance.ingredient_id: instance.amount})
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def remove_ingredient_from_lists(sender, instance, **kwargs):
+    change_ingredients_in_lists(instance.recipe_id,
+                                {instance.ingredient_id: -instance.amount})
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_previous_values(sender, instance, **kwargs):
+    instance.previous_image = instance.previous_author_id = None
+    if instance.pk is not None:
+        instance.previous_image, instance.previous_author_id = (
+            Recipe.objects.filter(pk=instance.pk).values_list(
+                'image', 'author_id').first() or (None, None))
+
+
+@receiver(post_save, sender=Recipe)
+def release_previous_image(sender, instance, **kwargs):
+    previous_image = getattr(instance, 'previous_image', None)
+    if previous_image and previous_image != instance.image.name:
+        transaction.on_commit(partial(release_images, [previous_image]))
+
+
+@receiver(post_delete, sender=Recipe)
+def release_image(sender, instance, **kwargs):
+    transaction.on_commit(partial(release_images, [instance.image.name]))
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Follow)
+def increment_counters(sender, instance, created, **kwargs):
+    if created:
+        change_counters(instance, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Follow)
+def decrement_counters(sender, instance, **kwargs):
+    change_counters(instance, -1)
+
+
+@receiver(post_save, sender=Recipe)
+def move_recipe_count(sender, instance, created, **kwargs):
+    previous_author_id = getattr(instance, 'previous_author_id', None)
+    if created or previous_author_id in (None, instance.author_id):
+        return
+    change_counter(User, previous_author_id, 'recipes_count', -1)
+    change_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, **kwargs):
+    previous_author_id = getattr(instance, 'previous_author_id', None)
+    if created:
+        fan_out_recipes([instance.pk])
+    elif previous_author_id not in (None, instance.author_id):
+        FeedItem.objects.filter(recipe=instance).delete()
+        fan_out_recipes([instance.pk])
+
+
+@receiver(post_save, sender=Follow)
+def add_author_to_feed(sender, instance, created, **kwargs):
+    if created:
+        add_authors_to_feed(instance.user_id, [instance.author_id])
+        sync_crossed_authors([instance.author_id], 1)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_author_from_feed(sender, instance, **kwargs):
+    remove_authors_from_feed(instance.user_id, [instance.author_id])
+    sync_crossed_authors([instance.author_id], -1)
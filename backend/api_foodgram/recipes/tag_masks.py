@@ -0,0 +1,65 @@
+from collections import defaultdict
+
+from django.db.models import Count, F
+
+from .models import Recipe
+
+MAX_ENUMERATED_BITS = 12
+
+
+def get_mask(bits):
+    mask = 0
+    for bit in bits:
+        mask |= 1 << bit
+    return mask
+
+
+def get_matching_masks(mask, all_mask):
+    values = []
+    submask = all_mask
+    while submask:
+        if submask & mask:
+            values.append(submask)
+        submask = (submask - 1) & all_mask
+    return values
+
+
+def filter_by_tags_mask(queryset, mask, all_mask):
+    if bin(all_mask).count('1') <= MAX_ENUMERATED_BITS:
+        return queryset.filter(
+            tags_mask__in=get_matching_masks(mask, all_mask))
+    return queryset.annotate(
+        matched_tags=F('tags_mask').bitand(mask)
+    ).filter(matched_tags__gt=0)
+
+
+def count_by_tags(queryset, tag_bits):
+    counts = defaultdict(int)
+    rows = queryset.order_by().values('tags_mask').annotate(
+        recipes_count=Count('pk'))
+    for row in rows:
+        for slug, bit in tag_bits.items():
+            if row['tags_mask'] & (1 << bit):
+                counts[slug] += row['recipes_count']
+    return {slug: counts[slug] for slug in tag_bits}
+
+
+def get_expected_masks():
+    masks = dict.fromkeys(Recipe.objects.values_list('pk', flat=True), 0)
+    rows = Recipe.tags.through.objects.exclude(tag__bit=None).values_list(
+        'recipe_id', 'tag__bit')
+    for recipe_id, bit in rows.iterator():
+        masks[recipe_id] |= 1 << bit
+    return masks
+
+
+def sync_tags_masks(check_only=False):
+    actual = dict(Recipe.objects.values_list('pk', 'tags_mask'))
+    drift = defaultdict(list)
+    for recipe_id, mask in get_expected_masks().items():
+        if actual.get(recipe_id) != mask:
+            drift[mask].append(recipe_id)
+    if not check_only:
+        for mask, recipe_ids in drift.items():
+            Recipe.objects.filter(pk__in=recipe_ids).update(tags_mask=mask)
+    return sum(len(recipe_ids) for recipe_ids in drift.values())
@@ -0,0 +1,124 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from jobs.queue import enqueue
+from .models import Recipe
+
+VARIANT_DIR = 'r'
+FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+CONTENT_TYPES = {'webp': 'image/webp', 'jpg': 'image/jpeg'}
+WRITTEN_KEY = 'image-variants-written'
+PRUNE_VARIANTS_JOB = 'recipes.prune_image_variants'
+PRUNE_SLACK = 0.1
+
+
+def get_variant_name(name, width, height):
+    stem = os.path.splitext(name)[0]
+    return (f'{VARIANT_DIR}/{width}x{height}/'
+            f'{stem}.{settings.IMAGE_VARIANT_FORMAT}')
+
+
+def get_variant_url(name, size):
+    if not name:
+        return None
+    width, height = settings.IMAGE_VARIANT_SIZES[size]
+    return default_storage.url(get_variant_name(name, width, height))
+
+
+def get_original_name(variant, width, height):
+    if (width, height) not in settings.IMAGE_VARIANT_SIZES.values():
+        return None
+    stem, extension = os.path.splitext(variant)
+    if extension != f'.{settings.IMAGE_VARIANT_FORMAT}':
+        return None
+    return Recipe.objects.filter(image__startswith=f'{stem}.').values_list(
+        'image', flat=True).first()
+
+
+def get_variant(variant, width, height):
+    if '..' in variant.split('/'):
+        return None
+    path = default_storage.path(
+        f'{VARIANT_DIR}/{width}x{height}/{variant}')
+    if os.path.exists(path):
+        return path
+    name = get_original_name(variant, width, height)
+    if name is None or not default_storage.exists(name):
+        return None
+    render_variant(name, path, width, height)
+    return path
+
+
+def render_variant(name, path, width, height):
+    image_format = FORMATS[settings.IMAGE_VARIANT_FORMAT]
+    with default_storage.open(name) as file, Image.open(file) as image:
+        image.draft('RGB', (width, height))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((width, height), Image.LANCZOS)
+        keep_alpha = image_format == 'WEBP' and (
+            image.mode in ('RGBA', 'LA') or 'transparency' in image.info)
+        image = image.convert('RGBA' if keep_alpha else 'RGB')
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix='.')
+    with os.fdopen(descriptor, 'wb') as file:
+        image.save(file, image_format,
+                   quality=settings.IMAGE_VARIANT_QUALITY)
+        size = file.tell()
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, path)
+    count_written(size)
+
+
+def count_written(size):
+    cache.add(WRITTEN_KEY, 0, None)
+    try:
+        written = cache.incr(WRITTEN_KEY, size)
+    except ValueError:
+        return
+    if written > settings.IMAGE_VARIANT_CACHE_BYTES * PRUNE_SLACK:
+        cache.set(WRITTEN_KEY, 0, None)
+        enqueue(PRUNE_VARIANTS_JOB)
+
+
+def delete_variants(name):
+    for width, height in settings.IMAGE_VARIANT_SIZES.values():
+        default_storage.delete(get_variant_name(name, width, height))
+
+
+def get_variant_files():
+    root = default_storage.path(VARIANT_DIR)
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield stat.st_atime, stat.st_size, path
+
+
+def prune_variants(max_bytes=None):
+    if max_bytes is None:
+        max_bytes = settings.IMAGE_VARIANT_CACHE_BYTES
+    files = sorted(get_variant_files())
+    total = sum(size for _, size, _ in files)
+    if total <= max_bytes:
+        return 0
+    target = max_bytes * (1 - PRUNE_SLACK)
+    removed = 0
+    for _, size, path in files:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
@@ -1,7 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from recipes.views import (FavoriteViewSet, IngredientViewSet, RecipeViewSet,
+from recipes.views import (BatchView, FavoriteViewSet, FeedView,
+                           IngredientViewSet, RecipeViewSet,
                            ShoppingCartViewSet, TagViewSet)
 
 
@@ -12,6 +13,8 @@ router.register('ingredients', IngredientViewSet)
 router.register('tags', TagViewSet)
 
 urlpatterns = [
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('feed/', FeedView.as_view(), name='feed'),
     path('recipes/<int:recipe_id>/favorite/', FavoriteViewSet.as_view(),
          name='favorite'),
     path('recipes/<int:recipe_id>/shopping_cart/',
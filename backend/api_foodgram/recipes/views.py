@@ -1,23 +1,62 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from functools import partial
+
+from django.conf import settings
+from django.db.models import BooleanField, Exists, OuterRef, Value
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, viewsets
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import (AllowAny, IsAdminUser,
+                                        IsAuthenticated)
+from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from api_foodgram.pagination import CustomPagination
-from .filters import IngredientFilter, RecipeFilter
-from .mixins import AddDeleteListMixin
-from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+from api_foodgram.pagination import CustomPagination, KeysetPagination
+from users.models import Follow
+from .filters import IngredientFilter, RecipeFilter, RecipeSearchFilter
+from .batch import apply_operations
+from .cache import (INGREDIENTS_VERSION, TAGS_VERSION, get_tag_map,
+                    recipe_version, viewer_version)
+from .events import get_recipe_stats, record_event
+from .feed import get_feed_ids
+from .importer import RecipeImporter
+from .ingredient_index import get_ingredient_index
+from .mixins import AddDeleteListMixin, ConditionalGetMixin
+from .models import (Favorite, Ingredient, Recipe, RecipeStat,
                      ShoppingCart, Tag)
 from .permissions import IsAdminOrReadOnly, OwnerOrReadOnly
-from .serializers import (FavoriteCreateSerializer, IngredientSerializer,
-                          RecipeCreateSerializer, RecipeRetrieveSerializer,
-                          ShoppingCartCreateSerializer, TagSerializer)
+from .renderers import CSVRenderer, PDFRenderer, TextRenderer
+from .serializers import (BatchSerializer, IngredientSerializer,
+                          RecipeCreateSerializer, RecipeEventSerializer,
+                          RecipeRetrieveSerializer,
+                          ShoppingListItemSerializer, TagSerializer)
+from .shopping_list import (get_shopping_list, iter_shopping_list_csv,
+                            iter_shopping_list_txt, open_shopping_list_pdf)
+from .tag_masks import count_by_tags
+from .thumbnails import CONTENT_TYPES, get_variant
+
 
+def get_recipe_queryset(user):
+    queryset = Recipe.objects.defer('search_vector')
+    if user.is_anonymous:
+        return queryset.annotate(
+            is_favorited=Value(False, output_field=BooleanField()),
+            is_in_shopping_cart=Value(False, output_field=BooleanField()),
+            is_subscribed=Value(False, output_field=BooleanField()),
+        )
+    return queryset.annotate(
+        is_favorited=Exists(Favorite.objects.filter(
+            user=user, recipe=OuterRef('pk'))),
+        is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+            user=user, recipe=OuterRef('pk'))),
+        is_subscribed=Exists(Follow.objects.filter(
+            user=user, author=OuterRef('author'))),
+    )
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+
+class IngredientViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    version_names = (INGREDIENTS_VERSION,)
     serializer_class = IngredientSerializer
     queryset = Ingredient.objects.all()
     filter_backends = [IngredientFilter]
@@ -25,57 +64,173 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
     permission_classes = (AllowAny,)
 
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get(IngredientFilter.search_param):
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(self.search, request)
+
+    def search(self, request):
+        name = request.query_params[IngredientFilter.search_param]
+        limit = settings.INGREDIENT_SEARCH_LIMIT
+        index = get_ingredient_index()
+        if index is not None:
+            return Response(index.search(name, limit))
+        queryset = self.filter_queryset(self.get_queryset())[:limit]
+        return Response(self.get_serializer(queryset, many=True).data)
 
-class TagViewSet(viewsets.ModelViewSet):
+
+class TagViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    version_names = (TAGS_VERSION,)
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
     pagination_class = None
     permission_classes = (IsAdminOrReadOnly,)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.all()
+class RecipeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    conditional_actions = ('retrieve',)
     permission_classes = (OwnerOrReadOnly,)
     pagination_class = CustomPagination
-    filter_backends = [filters.SearchFilter, DjangoFilterBackend]
+    filter_backends = [RecipeSearchFilter, DjangoFilterBackend]
     filterset_class = RecipeFilter
+    cursor_orderings = ('-id', 'id', 'cooking_time', '-cooking_time',
+                        '-favorites_count')
+
+    def get_queryset(self):
+        return get_recipe_queryset(self.request.user)
+
+    def get_version_names(self):
+        names = [recipe_version(self.kwargs['pk']), TAGS_VERSION,
+                 INGREDIENTS_VERSION]
+        if self.request.user.is_authenticated:
+            names.append(viewer_version(self.request.user.pk))
+        return names
 
     def get_serializer_class(self):
         if self.action == 'list' or self.action == 'retrieve':
             return RecipeRetrieveSerializer
+        if self.action == 'events':
+            return RecipeEventSerializer
         return RecipeCreateSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            record_event(int(self.kwargs['pk']), RecipeStat.VIEW)
+        return response
+
+    @action(detail=True, methods=['post'], permission_classes=[AllowAny])
+    def events(self, request, pk=None):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe = get_object_or_404(Recipe.objects.only('pk'), pk=pk)
+        record_event(recipe.pk, serializer.validated_data['kind'])
+        return Response(status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    def stats(self, request, pk=None):
+        recipe = get_object_or_404(Recipe.objects.only('pk'), pk=pk)
+        return Response(get_recipe_stats(recipe.pk))
+
+    @action(detail=False, methods=['get'], url_path='tag_counts')
+    def tag_counts(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        counts = count_by_tags(queryset, get_tag_map())
+        return Response([{'slug': slug, 'count': count}
+                         for slug, count in counts.items()])
+
+    @action(detail=False, methods=['post'],
+            permission_classes=[IsAdminUser],
+            url_path='import',
+            url_name='import')
+    def import_recipes(self, request):
+        importer = RecipeImporter(request.user,
+                                  settings.RECIPE_IMPORT_WORKERS)
+        results = list(importer.run(request.stream or []))
+        return Response({**importer.summary, 'results': results})
+
     @action(detail=False, methods=['get'],
             permission_classes=[IsAuthenticated],
+            renderer_classes=[TextRenderer, CSVRenderer, PDFRenderer],
             url_path='download_shopping_cart',
             url_name='download')
     def download_shopping_cart(self, request):
-        user = request.user
-        recipes = RecipeIngredient.objects.filter(recipe__cart__user=user)
-        ingredients = recipes.values(
-            'ingredient__name',
-            'ingredient__measurement_unit',).annotate(total=Sum(
-                'amount'))
-        shopping_cart = []
-        for ingredient in ingredients:
-            name = ingredient['ingredient__name']
-            measurement_unit = ingredient['ingredient__measurement_unit']
-            total = ingredient['total']
-            shopping_cart.append(
-                f"{name}: {total} {measurement_unit}\n"
-            )
-        response = HttpResponse(shopping_cart, content_type='text/plain')
-        response['Content-Disposition'] = 'attachment; filename="list.txt"'
+        renderer = request.accepted_renderer
+        filename = f'list.{renderer.format}'
+        if isinstance(renderer, PDFRenderer):
+            return FileResponse(open_shopping_list_pdf(request.user),
+                                as_attachment=True, filename=filename,
+                                content_type=renderer.media_type)
+        items = get_shopping_list(request.user)
+        if isinstance(renderer, CSVRenderer):
+            content = iter_shopping_list_csv(items)
+        else:
+            content = iter_shopping_list_txt(items)
+        response = StreamingHttpResponse(
+            content, content_type=f'{renderer.media_type}; charset=utf-8')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"')
         return response
 
+    @action(detail=False, methods=['get'],
+            permission_classes=[IsAuthenticated],
+            url_path='shopping_list',
+            url_name='shopping_list')
+    def shopping_list(self, request):
+        serializer = ShoppingListItemSerializer(
+            get_shopping_list(request.user), many=True)
+        return Response(serializer.data)
+
 
 class FavoriteViewSet(AddDeleteListMixin, APIView):
-    serializer_class = FavoriteCreateSerializer
     model_class = Favorite
+    duplicate_message = 'Нельзя добавить рецепт в избранное дважды'
     permission_class = (IsAuthenticated,)
 
 
 class ShoppingCartViewSet(AddDeleteListMixin, APIView):
-    serializer_class = ShoppingCartCreateSerializer
     model_class = ShoppingCart
+    duplicate_message = 'Нельзя добавить рецепт в корзину дважды'
     permission_class = (IsAuthenticated,)
+
+
+class FeedView(APIView):
+    permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPagination
+
+    def get(self, request):
+        paginator = self.pagination_class()
+        recipe_ids = paginator.paginate_keys(
+            partial(get_feed_ids, request.user), request)
+        recipes = get_recipe_queryset(request.user).in_bulk(recipe_ids)
+        serializer = RecipeRetrieveSerializer(
+            [recipes[pk] for pk in recipe_ids if pk in recipes],
+            many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+
+class BatchView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = apply_operations(
+            request.user, serializer.validated_data['operations'])
+        return Response({'results': results})
+
+
+class ImageVariantView(APIView):
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+
+    def get(self, request, width, height, name):
+        path = get_variant(name, int(width), int(height))
+        if path is None:
+            raise Http404
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type=CONTENT_TYPES[settings.IMAGE_VARIANT_FORMAT])
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
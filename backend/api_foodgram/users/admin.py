@@ -8,7 +8,7 @@ EMPTY_VALUE = '-пусто-'
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = ('id', 'username', 'email', 'first_name',
-                    'last_name', 'role')
+                    'last_name', 'role', 'recipes_count', 'followers_count')
     search_fields = ('username',)
     list_filter = ('email', 'username',)
     empty_value_display = EMPTY_VALUE
@@ -1,8 +1,10 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from api_foodgram.mixins import CounterFieldsMixin
 
-class User(AbstractUser):
+
+class User(CounterFieldsMixin, AbstractUser):
     USER = 'user'
     ADMIN = 'admin'
     USER_ROLE = [
@@ -37,6 +39,14 @@ class User(AbstractUser):
         choices=USER_ROLE, default=USER
     )
 
+    recipes_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Рецептов')
+
+    followers_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Подписчиков')
+
+    counter_fields = ('recipes_count', 'followers_count')
+
     @property
     def is_user(self):
         return self.role == self.USER
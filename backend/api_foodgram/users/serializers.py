@@ -1,10 +1,15 @@
-from django.utils.datastructures import MultiValueDictKeyError
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
 
 from recipes.models import Recipe
+from recipes.thumbnails import get_variant_url
 from .models import Follow, User
 
+RECIPES_LIMIT = 10
+MAX_RECIPES_LIMIT = 50
+
 
 class CustomUserCreateSerializer(UserCreateSerializer):
 
@@ -42,19 +47,65 @@ class CustomUserSerializer(UserSerializer):
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = request.user
         return Follow.objects.filter(author=obj, user=user).exists()
 
 
 class RecipeEasyRetrieveSerializer(serializers.ModelSerializer):
+    image_small = serializers.SerializerMethodField()
+    image_medium = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'name',
-            'image', 'cooking_time',
+            'image', 'image_small', 'image_medium', 'cooking_time',
         )
 
+    def get_image_small(self, obj):
+        return get_variant_url(obj.image.name, 'small')
+
+    def get_image_medium(self, obj):
+        return get_variant_url(obj.image.name, 'medium')
+
+
+def get_recipes_limit(request):
+    try:
+        limit = int(request.query_params['recipes_limit'])
+    except (AttributeError, KeyError, ValueError):
+        return RECIPES_LIMIT
+    return min(max(limit, 0), MAX_RECIPES_LIMIT)
+
+
+def get_latest_recipes(author_ids, limit):
+    recipes = {author_id: [] for author_id in author_ids}
+    if not recipes or not limit:
+        return recipes
+    queryset = Recipe.objects.filter(author_id__in=recipes).only(
+        'id', 'name', 'image', 'cooking_time', 'author_id').annotate(
+        row_number=Window(RowNumber(), partition_by=[F('author_id')],
+                          order_by=F('id').desc())).order_by()
+    sql, params = queryset.query.sql_with_params()
+    for recipe in Recipe.objects.raw(
+            f'SELECT * FROM ({sql}) AS ranked WHERE row_number <= %s '
+            f'ORDER BY id DESC', params + (limit,)):
+        recipes[recipe.author_id].append(recipe)
+    return recipes
+
+
+class FollowRetrieveListSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        authors = list(data.all() if hasattr(data, 'all') else data)
+        recipes = get_latest_recipes(
+            [author.pk for author in authors],
+            get_recipes_limit(self.context.get('request')))
+        for author in authors:
+            author.latest_recipes = recipes[author.pk]
+        return super().to_representation(authors)
+
 
 class FollowRetrieveSerializer(serializers.ModelSerializer):
     recipes = serializers.SerializerMethodField()
@@ -63,7 +114,7 @@ class FollowRetrieveSerializer(serializers.ModelSerializer):
     last_name = serializers.ReadOnlyField()
     username = serializers.ReadOnlyField()
     email = serializers.ReadOnlyField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -71,22 +122,22 @@ class FollowRetrieveSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'email', 'first_name',
                   'last_name', 'recipes', 'recipes_count',
                   'is_subscribed',)
+        list_serializer_class = FollowRetrieveListSerializer
 
     def get_recipes(self, obj):
-        try:
-            limit = self.context.get('request').query_params['recipes_limit']
-        except MultiValueDictKeyError:
-            limit = 10
-        queryset = Recipe.objects.filter(author=obj)[:int(limit)]
-        return RecipeEasyRetrieveSerializer(queryset, many=True).data
-
-    def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj).count()
+        recipes = getattr(obj, 'latest_recipes', None)
+        if recipes is None:
+            recipes = get_latest_recipes(
+                [obj.pk], get_recipes_limit(self.context.get('request'))
+            )[obj.pk]
+        return RecipeEasyRetrieveSerializer(recipes, many=True).data
 
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = request.user
         return Follow.objects.filter(author=obj, user=user).exists()
 
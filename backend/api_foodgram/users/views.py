@@ -1,3 +1,4 @@
+from django.db.models import BooleanField, Value
 from django.shortcuts import get_object_or_404
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
@@ -27,6 +28,8 @@ class FollowRetrieveViewSet(viewsets.ModelViewSet):
     serializer_class = FollowRetrieveSerializer
     permission_classes = (permissions.AllowAny,)
     pagination_class = CustomPagination
+    cursor_orderings = ('username', '-username', '-id', 'id')
 
     def get_queryset(self):
-        return User.objects.filter(following__user=self.request.user)
+        return User.objects.filter(following__user=self.request.user).annotate(
+            is_subscribed=Value(True, output_field=BooleanField()))
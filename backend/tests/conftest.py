@@ -0,0 +1,77 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+RECIPES_COUNT = 12
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def discard_recipe_events():
+    yield
+    from recipes.events import buffer
+    with buffer.lock:
+        buffer.counts.clear()
+        buffer.pending = 0
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='reader', email='reader@example.com', password='Passw0rd!x')
+
+
+@pytest.fixture
+def author(django_user_model):
+    return django_user_model.objects.create_user(
+        username='author', email='author@example.com', password='Passw0rd!x')
+
+
+@pytest.fixture
+def tags():
+    from recipes.models import Tag
+    return [Tag.objects.create(name=f'Тег {number}', color=f'#00000{number}',
+                               slug=f'tag{number}')
+            for number in range(4)]
+
+
+@pytest.fixture
+def recipes(author, tags):
+    from recipes.models import Ingredient, Recipe, RecipeIngredient
+    from recipes.tag_masks import get_mask
+    ingredients = [Ingredient.objects.create(name=f'Ингредиент {number}',
+                                             measurement_unit='г')
+                   for number in range(5)]
+    recipes = []
+    for number in range(RECIPES_COUNT):
+        recipe_tags = tags[:number % len(tags) + 1]
+        recipe = Recipe.objects.create(
+            author=author, name=f'Рецепт {number}', text='Текст',
+            image='test.png', cooking_time=number + 1,
+            tags_mask=get_mask(tag.bit for tag in recipe_tags))
+        recipe.tags.set(recipe_tags)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=2)
+            for ingredient in ingredients)
+        recipes.append(recipe)
+    return recipes
+
+
+@pytest.fixture
+def anonymous_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(user):
+    from rest_framework.authtoken.models import Token
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+    return client
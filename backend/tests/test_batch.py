@@ -0,0 +1,47 @@
+import pytest
+
+BATCH_URL = '/api/batch/'
+
+
+@pytest.fixture
+def interleave(monkeypatch):
+    from recipes import batch
+
+    def interleave(toggle):
+        plan_operations = batch.plan_operations
+
+        def plan_then_toggle(*args, **kwargs):
+            planned = plan_operations(*args, **kwargs)
+            toggle()
+            return planned
+
+        monkeypatch.setattr(batch, 'plan_operations', plan_then_toggle)
+
+    return interleave
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('action, method, in_cart, amount', [
+    ('add', 'post', False, 2),
+    ('remove', 'delete', True, None),
+])
+def test_batch_skips_rows_changed_by_toggle(user_client, user, recipes,
+                                            interleave, action, method,
+                                            in_cart, amount):
+    from recipes.counters import repair_counters
+    from recipes.models import ShoppingCart
+    url = f'/api/recipes/{recipes[0].pk}/shopping_cart/'
+    if in_cart:
+        assert user_client.post(url).status_code == 201
+    interleave(lambda: getattr(user_client, method)(url))
+
+    response = user_client.post(BATCH_URL, {'operations': [
+        {'type': 'shopping_cart', 'action': action, 'id': recipes[0].pk},
+    ]}, format='json')
+
+    assert response.status_code == 200
+    assert response.data['results'][0]['status'] == 'unchanged'
+    assert ShoppingCart.objects.filter(user=user).exists() != in_cart
+    assert not any(repair_counters(check_only=True).values())
+    amounts = set(user.shopping_list.values_list('amount', flat=True))
+    assert amounts == ({amount} if amount else set())
@@ -0,0 +1,85 @@
+import base64
+import io
+import os
+
+import pytest
+from django.core.files.base import ContentFile
+from PIL import Image
+
+OLD = 10 ** 9
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def png():
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def save_old_image(content):
+    from django.core.files.storage import default_storage
+    name = default_storage.save('image.png', ContentFile(content))
+    os.utime(default_storage.path(name), (OLD, OLD))
+    return name
+
+
+@pytest.mark.django_db
+def test_release_deletes_unreferenced_image(media_root, png):
+    from django.core.files.storage import default_storage
+    from recipes.images import release_images
+    from jobs.models import Job
+    name = save_old_image(png)
+
+    release_images([name])
+
+    assert not default_storage.exists(name)
+    assert not Job.objects.exists()
+
+
+@pytest.mark.django_db
+def test_release_keeps_image_reused_by_upload(media_root, png):
+    from django.core.files.storage import default_storage
+    from recipes.fields import Base64ImageField
+    from recipes.images import RELEASE_IMAGES_JOB, release_images
+    from jobs.models import Job
+    name = save_old_image(png)
+
+    reused = Base64ImageField().to_internal_value(
+        'data:image/png;base64,' + base64.b64encode(png).decode())
+    release_images([name])
+
+    assert reused == name
+    assert default_storage.exists(name)
+    job = Job.objects.get()
+    assert job.name == RELEASE_IMAGES_JOB
+    assert name in job.payload
+
+
+@pytest.mark.django_db
+def test_create_recipe_with_line_wrapped_image(user_client, tags, media_root):
+    from recipes.models import Ingredient, Recipe
+    ingredient = Ingredient.objects.create(name='Соль', measurement_unit='г')
+    buffer = io.BytesIO()
+    Image.frombytes('RGB', (200, 200), os.urandom(200 * 200 * 3)).save(
+        buffer, 'PNG')
+    encoded = base64.encodebytes(buffer.getvalue()).decode()
+    assert len(encoded) > 64 * 1024 and '\n' in encoded
+
+    response = user_client.post('/api/recipes/', {
+        'ingredients': [{'id': ingredient.pk, 'amount': 10}],
+        'tags': [tags[0].pk],
+        'image': 'data:image/png;base64,' + encoded,
+        'name': 'Рецепт',
+        'text': 'Текст',
+        'cooking_time': 5,
+    }, format='json')
+
+    assert response.status_code == 201, response.data
+    recipe = Recipe.objects.get(pk=response.data['id'])
+    assert recipe.image.read() == buffer.getvalue()
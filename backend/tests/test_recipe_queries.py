@@ -0,0 +1,90 @@
+import statistics
+import time
+
+import pytest
+from django.core.cache import cache
+
+URL = '/api/recipes/'
+TAG_FILTER_LATENCY = 0.1
+
+
+@pytest.mark.django_db
+class TestRecipeQueries:
+
+    def test_anonymous_list(self, anonymous_client, recipes,
+                            django_assert_num_queries):
+        with django_assert_num_queries(5):
+            response = anonymous_client.get(URL)
+        assert response.status_code == 200
+        assert len(response.data['results']) == 6
+        with django_assert_num_queries(1):
+            anonymous_client.get(URL)
+
+    def test_anonymous_list_does_not_grow_with_page_size(
+            self, anonymous_client, recipes, django_assert_num_queries):
+        with django_assert_num_queries(5):
+            response = anonymous_client.get(URL, {'limit': len(recipes)})
+        assert len(response.data['results']) == len(recipes)
+
+    def test_authenticated_list(self, user_client, user, recipes,
+                                django_assert_num_queries):
+        from recipes.models import Favorite
+        Favorite.objects.create(user=user, recipe=recipes[-1])
+        with django_assert_num_queries(6):
+            response = user_client.get(URL)
+        assert response.status_code == 200
+        assert response.data['results'][0]['is_favorited'] is True
+        assert response.data['results'][1]['is_favorited'] is False
+        with django_assert_num_queries(2):
+            user_client.get(URL)
+        cache.clear()
+        with django_assert_num_queries(6):
+            user_client.get(URL, {'limit': len(recipes)})
+
+    def test_anonymous_detail(self, anonymous_client, recipes,
+                              django_assert_num_queries):
+        url = f'{URL}{recipes[0].pk}/'
+        with django_assert_num_queries(4):
+            response = anonymous_client.get(url)
+        assert response.status_code == 200
+        with django_assert_num_queries(1):
+            anonymous_client.get(url)
+
+    def test_authenticated_detail(self, user_client, recipes,
+                                  django_assert_num_queries):
+        url = f'{URL}{recipes[0].pk}/'
+        with django_assert_num_queries(5):
+            response = user_client.get(url)
+        assert response.status_code == 200
+        assert response.data['is_in_shopping_cart'] is False
+        with django_assert_num_queries(2):
+            user_client.get(url)
+
+
+@pytest.mark.django_db
+class TestTagFilterQueries:
+
+    @pytest.mark.parametrize('slugs, expected', [
+        (['tag3'], 3),
+        (['tag1', 'tag2', 'tag3'], 9),
+        (['tag0', 'tag1', 'tag2', 'tag3'], 12),
+    ])
+    def test_tag_filter(self, anonymous_client, recipes, slugs, expected,
+                        django_assert_num_queries):
+        params = {'tags': slugs, 'limit': len(recipes)}
+        with django_assert_num_queries(6) as captured:
+            response = anonymous_client.get(URL, params)
+        assert response.status_code == 200
+        assert response.data['count'] == expected
+        ids = [recipe['id'] for recipe in response.data['results']]
+        assert len(ids) == len(set(ids)) == expected
+        assert not any('DISTINCT' in query['sql'].upper()
+                       for query in captured.captured_queries)
+        with django_assert_num_queries(1):
+            anonymous_client.get(URL, params)
+        timings = []
+        for _ in range(20):
+            started = time.perf_counter()
+            anonymous_client.get(URL, params)
+            timings.append(time.perf_counter() - started)
+        assert statistics.median(timings) < TAG_FILTER_LATENCY
@@ -0,0 +1,41 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+TRANSACTION_CONTROL = ('SAVEPOINT', 'RELEASE', 'ROLLBACK')
+
+
+def count_statements(client, method, url):
+    with CaptureQueriesContext(connection) as captured:
+        response = getattr(client, method)(url)
+    statements = [query['sql'] for query in captured.captured_queries
+                  if not query['sql'].startswith(TRANSACTION_CONTROL)]
+    return response, statements
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('endpoint, table, budget', [
+    ('favorite', 'recipes_favorite', (4, 3, 3, 2)),
+    ('shopping_cart', 'recipes_shoppingcart', (7, 3, 6, 2)),
+])
+def test_toggle_query_budget(user_client, recipes, endpoint, table, budget):
+    url = f'/api/recipes/{recipes[0].pk}/{endpoint}/'
+    added, duplicate, deleted, missing = budget
+
+    response, statements = count_statements(user_client, 'post', url)
+    assert response.status_code == 201
+    assert response.data['id'] == recipes[0].pk
+    assert len(statements) == added
+    assert sum(table in sql for sql in statements) == 1
+
+    response, statements = count_statements(user_client, 'post', url)
+    assert response.status_code == 400
+    assert len(statements) == duplicate
+
+    response, statements = count_statements(user_client, 'delete', url)
+    assert response.status_code == 204
+    assert len(statements) == deleted
+
+    response, statements = count_statements(user_client, 'delete', url)
+    assert response.status_code == 404
+    assert len(statements) == missing